@@ -0,0 +1,218 @@
+"""Persistent cache of raw Overpass elements keyed by (geohash tile, place type).
+
+A radius query is answered from the tiles covering its bounding box: tiles that are cached and
+fresh are read from SQLite, only the missing ones are fetched (as one bbox query), and the
+caller filters the combined elements down to the exact radius. Entries expire after `ttl`
+seconds and the least recently used tiles are evicted beyond `max_tiles`.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import time_stage
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_cell_size(precision: int):
+    """(lat_height, lon_width) of a geohash cell in degrees."""
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch <<= 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str):
+    """(south, west, north, east) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for c in geohash:
+        cd = _BASE32.index(c)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (cd >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def radius_bbox(lat: float, lon: float, radius_m: float):
+    """(south, west, north, east) box that contains the circle of radius_m around lat/lon."""
+    dlat = radius_m / 111320.0
+    dlon = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+def tiles_covering(lat: float, lon: float, radius_m: float, precision: int) -> list:
+    """Geohashes of every cell that intersects the circle's bounding box."""
+    south, west, north, east = radius_bbox(lat, lon, radius_m)
+    height, width = geohash_cell_size(precision)
+    tiles = []
+    for i in range(math.floor((south + 90) / height), math.floor((north + 90) / height) + 1):
+        cell_lat = -90 + (i + 0.5) * height
+        for j in range(math.floor((west + 180) / width), math.floor((east + 180) / width) + 1):
+            tiles.append(geohash_encode(cell_lat, -180 + (j + 0.5) * width, precision))
+    return tiles
+
+
+def element_coords(el: dict):
+    """(lat, lon) of an Overpass element (node position or way/relation center), or None."""
+    if el.get('lat') is not None and el.get('lon') is not None:
+        return float(el['lat']), float(el['lon'])
+    center = el.get('center') or {}
+    if center.get('lat') is not None and center.get('lon') is not None:
+        return float(center['lat']), float(center['lon'])
+    return None
+
+
+class AmenityTileCache:
+    """SQLite-backed tile store for Overpass elements with TTL and LRU size bound."""
+
+    def __init__(self, db_path: str = "amenity_cache.db", precision: int = 6,
+                 ttl: float = 7 * 24 * 3600, max_tiles: int = 20000):
+        self.db_path = db_path
+        self.precision = precision
+        self.ttl = ttl
+        self.max_tiles = max_tiles
+        # One connection per process behind a lock; a threading.local would be per-greenlet
+        # under gevent workers and reopen the database on every request
+        self._conn = None
+        self._conn_pid = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._db() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS amenity_tiles (
+                geohash TEXT NOT NULL,
+                place_type TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                elements TEXT NOT NULL,
+                PRIMARY KEY (geohash, place_type)
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_amenity_tiles_last_used ON amenity_tiles (last_used)")
+            conn.commit()
+
+    @contextmanager
+    def _db(self):
+        """The process's connection, held exclusively for the duration of the block."""
+        with self._db_lock:
+            if self._conn is None or self._conn_pid != os.getpid():
+                # A handle inherited across fork() is dropped, never used or closed in the child
+                conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn, self._conn_pid = conn, os.getpid()
+            yield self._conn
+
+    def close(self):
+        """Close the connection; the next call opens a new one."""
+        with self._db_lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def tiles_for(self, lat: float, lon: float, radius_m: float) -> list:
+        return tiles_covering(lat, lon, radius_m, self.precision)
+
+    def get_many(self, tiles: list, place_type: str) -> dict:
+        """Fresh cached tiles among `tiles`: {geohash: [elements]}. Touches their LRU timestamp."""
+        with time_stage("sqlite_amenity_read"):
+            return self._get_many(tiles, place_type)
+
+    def _get_many(self, tiles: list, place_type: str) -> dict:
+        now = time.time()
+        found = {}
+        with self._db() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(tiles), 500):
+                batch = tiles[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT geohash, elements FROM amenity_tiles WHERE place_type = ? AND fetched_at > ? AND geohash IN ({placeholders})",
+                    [place_type, now - self.ttl, *batch]).fetchall()
+                found.update((geohash, json.loads(elements)) for geohash, elements in rows)
+            if found:
+                conn.executemany("UPDATE amenity_tiles SET last_used = ? WHERE geohash = ? AND place_type = ?",
+                                 [(now, geohash, place_type) for geohash in found])
+                conn.commit()
+        self.hits += len(found)
+        self.misses += len(tiles) - len(found)
+        return found
+
+    def put_many(self, place_type: str, tiles: dict):
+        """Store {geohash: [elements]} (empty lists are stored too: a known-empty tile) and evict."""
+        with time_stage("sqlite_amenity_write"):
+            self._put_many(place_type, tiles)
+
+    def _put_many(self, place_type: str, tiles: dict):
+        now = time.time()
+        with self._db() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO amenity_tiles (geohash, place_type, fetched_at, last_used, elements) VALUES (?, ?, ?, ?, ?)",
+                [(geohash, place_type, now, now, json.dumps(elements, separators=(",", ":"))) for geohash, elements in tiles.items()])
+            conn.execute("DELETE FROM amenity_tiles WHERE fetched_at <= ?", (now - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM amenity_tiles").fetchone()[0] - self.max_tiles
+            if excess > 0:
+                conn.execute("DELETE FROM amenity_tiles WHERE rowid IN (SELECT rowid FROM amenity_tiles ORDER BY last_used LIMIT ?)",
+                             (excess,))
+            conn.commit()
+
+    def split_into_tiles(self, elements: list, tiles: list) -> dict:
+        """Bucket fetched elements into the requested tiles (elements outside them are dropped)."""
+        buckets = {geohash: [] for geohash in tiles}
+        for el in elements:
+            coords = element_coords(el)
+            if coords is None:
+                continue
+            bucket = buckets.get(geohash_encode(coords[0], coords[1], self.precision))
+            if bucket is not None:
+                bucket.append(el)
+        return buckets
+
+    def stats(self) -> dict:
+        with self._db() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM amenity_tiles").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "tiles": row[0],
+            "max_tiles": self.max_tiles,
+            "precision": self.precision,
+            "ttl_seconds": self.ttl,
+            "tile_hits": self.hits,
+            "tile_misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,293 @@
+"""Offline amenity index: OSM amenities for the Bangalore region in a uniform-grid spatial index.
+
+Ingest an Overpass JSON dump or a local .osm.pbf extract (needs the optional `osmium` package)
+once, then answer nearby-places radius queries locally: the grid narrows the search to the
+cells overlapping the circle and distances are computed vectorized over those candidates.
+The categories are the ones /get_nearby_places maps to Overpass filters.
+
+Usage:
+    python amenity_index.py ingest <dump.json|extract.osm.pbf> [--out amenity_index.npz]
+    python amenity_index.py refresh [--out amenity_index.npz]   # re-download via Overpass
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+from geo import EARTH_RADIUS_M, haversine_meters
+
+# Tag filters per place type, in Overpass QL syntax; /get_nearby_places queries with the same ones
+CATEGORY_FILTERS = {
+    'school': [
+        '[amenity~"school|college|university|kindergarten"]',
+        '[building~"school|college|university|education"]',
+        '[education=*]'
+    ],
+    'hospital': [
+        '[amenity~"hospital|clinic|doctors|healthcare"]',
+        '[healthcare=*]',
+        '[medical=*]',
+        '[building=hospital]',
+        '[amenity=pharmacy]',
+        '[shop=pharmacy]'
+    ],
+    'restaurant': [
+        '[amenity~"restaurant|cafe|fast_food|food_court"]',
+        '[cuisine=*]',
+        '[shop~"food|bakery"]'
+    ],
+    'mall': [
+        '[shop~"mall|department_store|supermarket"]',
+        '[amenity=marketplace]',
+        '[building=retail]',
+        '[building=commercial]'
+    ],
+}
+CATEGORIES = tuple(CATEGORY_FILTERS)
+# (south, west, north, east) covering the Bangalore urban district
+BANGALORE_BBOX = (12.70, 77.30, 13.25, 77.90)
+FORMAT_VERSION = 1
+
+_FILTER_RE = re.compile(r'^\[(?P<key>[^=~\]]+)(?P<op>[=~])"?(?P<value>[^"\]]*)"?\]$')
+
+
+def parse_filter(flt: str):
+    """'[amenity~"a|b"]' -> (key, op, value); '=*' is read as "tag present"."""
+    m = _FILTER_RE.match(flt.strip())
+    if not m:
+        raise ValueError(f"❌ Unsupported filter syntax: {flt}")
+    key, op, value = m.group('key'), m.group('op'), m.group('value')
+    if op == '=' and value == '*':
+        return key, 'exists', None
+    if op == '~':
+        return key, '~', re.compile(value)
+    return key, '=', value
+
+
+_RULES = {name: [parse_filter(f) for f in filters] for name, filters in CATEGORY_FILTERS.items()}
+
+
+def category_mask(tags: dict) -> int:
+    """Bit i is set when the tags match any filter of CATEGORIES[i]."""
+    mask = 0
+    for bit, name in enumerate(CATEGORIES):
+        for key, op, value in _RULES[name]:
+            tag = tags.get(key)
+            if tag is None:
+                continue
+            if op == 'exists' or (op == '=' and tag == value) or (op == '~' and value.search(tag)):
+                mask |= 1 << bit
+                break
+    return mask
+
+
+def project(lat, lon, ref_lat: float):
+    """Equirectangular projection to meters around ref_lat (accurate at city scale)."""
+    k = math.radians(1) * EARTH_RADIUS_M
+    return np.asarray(lon) * k * math.cos(math.radians(ref_lat)), np.asarray(lat) * k
+
+
+def _centroid(points):
+    if not points:
+        return None
+    return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+
+def records_from_overpass(data: dict):
+    """Yield (type, id, lat, lon, tags) from an Overpass JSON dump (`out center`, `out geom`
+    or plain `out` with the way nodes included)."""
+    elements = data.get('elements', [])
+    node_coords = {el['id']: (el['lat'], el['lon']) for el in elements
+                   if el.get('type') == 'node' and 'lat' in el and 'lon' in el}
+    for el in elements:
+        tags = el.get('tags') or {}
+        if not tags:
+            continue
+        if 'lat' in el and 'lon' in el:
+            coords = (el['lat'], el['lon'])
+        elif el.get('center'):
+            coords = (el['center']['lat'], el['center']['lon'])
+        elif el.get('geometry'):
+            coords = _centroid([(p['lat'], p['lon']) for p in el['geometry'] if p])
+        else:
+            coords = _centroid([node_coords[n] for n in el.get('nodes', []) if n in node_coords])
+        if coords is not None:
+            yield el.get('type', 'node'), el.get('id'), float(coords[0]), float(coords[1]), tags
+
+
+def records_from_pbf(path: str):
+    """Yield (type, id, lat, lon, tags) for tagged nodes and ways (way centroid) of a .osm.pbf."""
+    try:
+        import osmium
+    except ImportError:
+        raise SystemExit("❌ Reading .osm.pbf needs the optional 'osmium' package (pip install osmium)")
+
+    records = []
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            if len(n.tags) and n.location.valid():
+                records.append(('node', n.id, n.location.lat, n.location.lon, {t.k: t.v for t in n.tags}))
+
+        def way(self, w):
+            if not len(w.tags):
+                return
+            tags = {t.k: t.v for t in w.tags}
+            if not category_mask(tags):
+                return
+            coords = _centroid([(nd.lat, nd.lon) for nd in w.nodes if nd.location.valid()])
+            if coords is not None:
+                records.append(('way', w.id, coords[0], coords[1], tags))
+
+    Handler().apply_file(path, locations=True)
+    return records
+
+
+class AmenityIndex:
+    """Categorised amenity points with a uniform grid over projected coordinates."""
+
+    def __init__(self, lat, lon, mask, elements, cell_size: float = 1000.0, ref_lat: float = None):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.mask = np.asarray(mask, dtype=np.uint8)
+        self.elements = elements
+        self.cell_size = float(cell_size)
+        self.ref_lat = float(ref_lat if ref_lat is not None else (self.lat.mean() if len(self.lat) else 0.0))
+        self._build_grid()
+
+    def _build_grid(self):
+        x, y = project(self.lat, self.lon, self.ref_lat)
+        cx = np.floor(x / self.cell_size).astype(np.int64)
+        cy = np.floor(y / self.cell_size).astype(np.int64)
+        self._cx0 = int(cx.min()) if len(cx) else 0
+        self._cy0 = int(cy.min()) if len(cy) else 0
+        self._ny = int(cy.max()) - self._cy0 + 1 if len(cy) else 1
+        cell = (cx - self._cx0) * self._ny + (cy - self._cy0)
+        # Points sorted by cell id; each cell is a contiguous slice of `_order`
+        self._order = np.argsort(cell, kind='stable')
+        self._cells = cell[self._order]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def from_records(cls, records, bbox=BANGALORE_BBOX, cell_size: float = 1000.0) -> "AmenityIndex":
+        south, west, north, east = bbox
+        seen = set()
+        lat, lon, mask, elements = [], [], [], []
+        for el_type, el_id, plat, plon, tags in records:
+            if not (south <= plat <= north and west <= plon <= east) or (el_type, el_id) in seen:
+                continue
+            m = category_mask(tags)
+            if not m:
+                continue
+            seen.add((el_type, el_id))
+            lat.append(plat)
+            lon.append(plon)
+            mask.append(m)
+            elements.append({"type": el_type, "id": el_id, "lat": plat, "lon": plon, "tags": tags})
+        return cls(lat, lon, mask, elements, cell_size=cell_size)
+
+    def counts(self) -> dict:
+        return {name: int(((self.mask >> bit) & 1).sum()) for bit, name in enumerate(CATEGORIES)}
+
+    def query(self, lat: float, lon: float, radius: float, place_type: str) -> list:
+        """Elements of `place_type` within `radius` meters, nearest first."""
+        bit = CATEGORIES.index(place_type)
+        if not len(self):
+            return []
+        x, y = project(lat, lon, self.ref_lat)
+        reach = radius / self.cell_size
+        cx_lo = max(int(math.floor(x / self.cell_size - reach)) - self._cx0, 0)
+        cx_hi = int(math.floor(x / self.cell_size + reach)) - self._cx0
+        cy_lo = max(int(math.floor(y / self.cell_size - reach)) - self._cy0, 0)
+        cy_hi = min(int(math.floor(y / self.cell_size + reach)) - self._cy0, self._ny - 1)
+        if cx_hi < 0 or cy_hi < cy_lo:
+            return []
+        # One contiguous run of cell ids per grid column
+        slices = []
+        for cx in range(cx_lo, cx_hi + 1):
+            lo = np.searchsorted(self._cells, cx * self._ny + cy_lo, side='left')
+            hi = np.searchsorted(self._cells, cx * self._ny + cy_hi, side='right')
+            if hi > lo:
+                slices.append(self._order[lo:hi])
+        if not slices:
+            return []
+        cand = np.concatenate(slices)
+        cand = cand[(self.mask[cand] >> bit) & 1 == 1]
+        dist = haversine_meters(lat, lon, self.lat[cand], self.lon[cand])
+        keep = dist <= radius
+        cand, dist = cand[keep], dist[keep]
+        return [self.elements[i] for i in cand[np.argsort(dist, kind='stable')]]
+
+    def save(self, path: str):
+        meta = {"format_version": FORMAT_VERSION, "categories": list(CATEGORIES),
+                "cell_size": self.cell_size, "ref_lat": self.ref_lat, "created_at": time.time()}
+        # Write next to the target and swap, so a running server never sees a half-written file
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, lat=self.lat, lon=self.lon, mask=self.mask,
+                            elements=np.frombuffer(json.dumps(self.elements, separators=(",", ":")).encode(), dtype=np.uint8),
+                            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AmenityIndex":
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes())
+            if meta.get("format_version") != FORMAT_VERSION or meta.get("categories") != list(CATEGORIES):
+                raise ValueError(f"❌ {path} was built with different categories or format; re-run the ingest")
+            elements = json.loads(data['elements'].tobytes())
+            return cls(data['lat'], data['lon'], data['mask'], elements,
+                       cell_size=meta["cell_size"], ref_lat=meta["ref_lat"])
+
+
+def overpass_region_query(bbox=BANGALORE_BBOX) -> str:
+    """Overpass query for every category inside bbox, for the refresher."""
+    box = ",".join(f"{v:.4f}" for v in bbox)
+    parts = []
+    for filters in CATEGORY_FILTERS.values():
+        for flt in filters:
+            parts.append(f"node({box}){flt};way({box}){flt};relation({box}){flt};")
+    return f"[out:json][timeout:900];({''.join(parts)})\nout center qt;"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline amenity index used by /get_nearby_places")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="load an Overpass JSON dump or .osm.pbf extract")
+    ingest.add_argument("source")
+    refresh = sub.add_parser("refresh", help="download the region from Overpass and rebuild")
+    refresh.add_argument("--endpoints", default=None, help="comma-separated Overpass mirrors")
+    for p in (ingest, refresh):
+        p.add_argument("--out", default="amenity_index.npz")
+        p.add_argument("--bbox", default=",".join(map(str, BANGALORE_BBOX)), help="south,west,north,east")
+        p.add_argument("--cell-size", type=float, default=1000.0, help="grid cell size in meters")
+    args = parser.parse_args()
+    bbox = tuple(float(v) for v in args.bbox.split(","))
+
+    started = time.perf_counter()
+    if args.command == "ingest":
+        if args.source.endswith(".pbf"):
+            records = records_from_pbf(args.source)
+        else:
+            with open(args.source) as f:
+                records = records_from_overpass(json.load(f))
+    else:
+        from overpass_client import OverpassClient
+        endpoints = args.endpoints.split(",") if args.endpoints else None
+        elements, url = OverpassClient(endpoints, mode="sequential", timeout=900).fetch(overpass_region_query(bbox))
+        if url is None:
+            raise SystemExit("❌ No Overpass mirror returned data; keeping the existing index")
+        records = records_from_overpass({"elements": elements})
+
+    index = AmenityIndex.from_records(records, bbox=bbox, cell_size=args.cell_size)
+    index.save(args.out)
+    print(f"✅ Indexed {len(index)} amenities {index.counts()} into {args.out} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
-from flask import Flask, request, jsonify, render_template, session
+from flask import Flask, request, jsonify, render_template, g, Response
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 
 import numpy as np
-import pickle
 import json
-import pandas as pd
 from flask_cors import CORS
 import requests
-import sqlite3
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy import inspect as sa_inspect
 import os
 
+from feature_schema import FeatureSchema
+from prediction_cache import PredictionCache
+from model_registry import ModelRegistry
+from http_cache import StaticPayload
+from geocode_store import GeocodeRepository, osm_geocode
+from overpass_client import DEFAULT_ENDPOINTS, OverpassClient
+from amenity_cache import AmenityTileCache, element_coords, geohash_bounds
+from amenity_index import CATEGORY_FILTERS, AmenityIndex
+from geo import haversine_meters, rank_places
+import metrics
+from metrics import observe_upstream, request_log, time_stage
+import time
+
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///users.db')
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev_secret_key_123')
 db = SQLAlchemy(app)
@@ -21,50 +33,86 @@ bcrypt = Bcrypt(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login_page'
 login_manager.login_message_category = "info"
-NOMINATIM_API_URL = "https://nominatim.openstreetmap.org/search"
+# "native": walk the exported flat-array forest (forest_model.py); "sklearn": unpickle and call model.predict
+app.config["INFERENCE_ENGINE"] = os.environ.get("INFERENCE_ENGINE", "native").lower()
+# Base-price cache in front of the model (entries, seconds); sqft is rounded to the form's precision
+app.config["PREDICTION_CACHE_SIZE"] = int(os.environ.get("PREDICTION_CACHE_SIZE", 4096))
+app.config["PREDICTION_CACHE_TTL"] = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+app.config["SQFT_DECIMALS"] = int(os.environ.get("SQFT_DECIMALS", 0))
+# Overridable so staging and load tests can point the geo routes at stand-in servers
+NOMINATIM_API_URL = os.environ.get("NOMINATIM_API_URL", "https://nominatim.openstreetmap.org/search")
+# Overpass mirrors (comma-separated) and how they are queried: hedged | race | sequential
+app.config["OVERPASS_ENDPOINTS"] = [u.strip() for u in os.environ.get("OVERPASS_ENDPOINTS", ",".join(DEFAULT_ENDPOINTS)).split(",") if u.strip()]
+app.config["OVERPASS_FETCH_MODE"] = os.environ.get("OVERPASS_FETCH_MODE", "hedged")
+app.config["OVERPASS_HEDGE_DELAY"] = float(os.environ.get("OVERPASS_HEDGE_DELAY", 2.0))
+# Nearby-places tile cache: SQLite file, geohash precision (6 ~ 1.2 x 0.6 km), entry TTL, max tiles
+app.config["AMENITY_CACHE_DB"] = os.environ.get("AMENITY_CACHE_DB", "amenity_cache.db")
+app.config["AMENITY_TILE_PRECISION"] = int(os.environ.get("AMENITY_TILE_PRECISION", 6))
+app.config["AMENITY_CACHE_TTL"] = float(os.environ.get("AMENITY_CACHE_TTL", 7 * 24 * 3600))
+app.config["AMENITY_CACHE_MAX_TILES"] = int(os.environ.get("AMENITY_CACHE_MAX_TILES", 20000))
+# Offline amenity index (amenity_index.py ingest); "auto" serves known place types from it when
+# the file exists and falls back to Overpass otherwise, "live" always asks Overpass
+app.config["AMENITY_INDEX_FILE"] = os.environ.get("AMENITY_INDEX_FILE", "amenity_index.npz")
+app.config["NEARBY_PLACES_SOURCE"] = os.environ.get("NEARBY_PLACES_SOURCE", "auto").lower()
+# SQLite file holding the geocoded heatmap_data table
+app.config["GEOCODE_DB"] = os.environ.get("GEOCODE_DB", "house_prices.db")
+# How long a name Nominatim could not resolve is answered 404 without asking again (seconds)
+app.config["GEOCODE_NEGATIVE_TTL"] = float(os.environ.get("GEOCODE_NEGATIVE_TTL", 6 * 3600))
+# Caps on the in-memory geocode maps (client-supplied names must not grow worker memory forever)
+app.config["GEOCODE_CACHE_MAX_ENTRIES"] = int(os.environ.get("GEOCODE_CACHE_MAX_ENTRIES", 50000))
+app.config["GEOCODE_NEGATIVE_MAX_ENTRIES"] = int(os.environ.get("GEOCODE_NEGATIVE_MAX_ENTRIES", 10000))
+# REQUEST_LOGGING=0 silences the per-request prints (payload dumps, price breakdowns, search chatter)
+app.config["REQUEST_LOGGING"] = os.environ.get("REQUEST_LOGGING", "1").lower() not in ("0", "false", "no", "off")
+metrics.REQUEST_LOGGING = app.config["REQUEST_LOGGING"]
+# ADMIN_ENDPOINTS=1 registers the unauthenticated /admin/* introspection routes and /metrics; off by default
+app.config["ADMIN_ENDPOINTS"] = os.environ.get("ADMIN_ENDPOINTS", "0").lower() in ("1", "true", "yes", "on")
 CORS(app)
 
-# Location tiers removed (handled by model)
 
-# Load the trained model
-import os
-import json
-import pickle
+def admin_route(rule: str, **options):
+    """app.route for operator-only views: registered only when ADMIN_ENDPOINTS is on, 404 otherwise."""
+    def decorator(view):
+        if app.config["ADMIN_ENDPOINTS"]:
+            return app.route(rule, **options)(view)
+        return view
+    return decorator
 
-model_file = "banglore_home_prices_model.pickle"
-columns_file = "columns.json"
 
-try:
-    # Check if model and column files exist
-    if not os.path.exists(model_file):
-        raise FileNotFoundError(f"❌ Model file '{model_file}' not found.")
-    
-    if not os.path.exists(columns_file):
-        raise FileNotFoundError(f"❌ Columns file '{columns_file}' not found.")
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
 
-    # Load the model
-    with open(model_file, "rb") as f:
-        model = pickle.load(f)
-    
-    # Load column names
-    with open(columns_file, "r") as f:
-        data_columns = json.load(f)["data_columns"]
 
-    if len(data_columns) < 4:
-        raise ValueError("❌ Invalid data_columns format. Expected at least 4 columns (sqft, bath, bhk, property_age, locations).")
+@app.after_request
+def record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Route templates (not raw paths) keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.registry.observe("app_http_request_duration_seconds", time.perf_counter() - started,
+                                 "Latency of HTTP requests by route", route=route, method=request.method,
+                                 status=str(response.status_code))
+    return response
 
-    # Extract locations (assuming first 3 columns are fixed: sqft, bath, bhk)
-    locations = data_columns[3:]
+# Location tiers removed (handled by model)
 
-    print(f"✅ Model and {len(locations)} locations loaded successfully!")
+prediction_cache = PredictionCache(app.config["PREDICTION_CACHE_SIZE"], app.config["PREDICTION_CACHE_TTL"])
 
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
-    data_columns = []
-    locations = []
+# Versioned model artifacts (model_registry.py publish); without models/CURRENT the files in the
+# working directory are served. Workers re-check the pointer at most every MODEL_POLL_INTERVAL seconds.
+app.config["MODEL_REGISTRY_DIR"] = os.environ.get("MODEL_REGISTRY_DIR", "models")
+app.config["MODEL_POLL_INTERVAL"] = float(os.environ.get("MODEL_POLL_INTERVAL", 5))
+
+# Cached base prices belong to the previous model
+model_registry = ModelRegistry(app.config["MODEL_REGISTRY_DIR"], engine=app.config["INFERENCE_ENGINE"],
+                               poll_interval=app.config["MODEL_POLL_INTERVAL"],
+                               on_swap=lambda bundle: prediction_cache.clear())
+model_registry.load_current()
 
 
+@app.before_request
+def check_model_version():
+    model_registry.poll()
 
 
 # --- Define simple models used by the app ---
@@ -93,8 +141,13 @@ class Favorite(db.Model):
     bath = db.Column(db.Integer, nullable=False)
     property_age = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
+    # Model version that computed `price` (NULL: price came from the client when it was saved)
+    model_version = db.Column(db.String(64), nullable=True)
     user = db.relationship('User', backref=db.backref('favorites', lazy=True))
 
+    # Serves "this user's favorites after id X" pages without scanning the table
+    __table_args__ = (db.Index("ix_favorite_user_id_id", "user_id", "id"),)
+
 
 
 
@@ -109,68 +162,94 @@ def calculate_age_factor(age: int) -> float:
     return 1 - (min(max(age, 0), 20) / 20) * 0.4
 
 
+def predict_base_prices(model, X: np.ndarray) -> np.ndarray:
+    """Run a bundle's model on a 2D feature matrix.
+    Only the pickle fallback can hit the monotonic_cst patch; the flat-array forest does not depend on sklearn.
+    """
+    try:
+        with time_stage("model_predict"):
+            return model.predict(X)
+    except AttributeError as e:
+        # Compatibility hack for older sklearn-saved ensembles
+        if 'monotonic_cst' not in str(e):
+            raise
+        def _patch_estimator(est):
+            if not hasattr(est, 'monotonic_cst'):
+                setattr(est, 'monotonic_cst', None)
+            if hasattr(est, 'estimators_'):
+                for sub in getattr(est, 'estimators_'):
+                    _patch_estimator(sub)
+        _patch_estimator(model)
+        return model.predict(X)
+
+
+def canonical_prediction_fields(data: dict) -> dict:
+    """Typed prediction fields with total_sqft rounded to SQFT_DECIMALS, so the single and batch
+    endpoints price the same input identically. Raises ValueError/TypeError/AttributeError on bad input.
+    """
+    return {
+        "location": data.get("location"),
+        "total_sqft": round(float(data.get("total_sqft", 0) or 0), app.config["SQFT_DECIMALS"]),
+        "bath": int(data.get("bath", 0) or 0),
+        "bhk": int(data.get("bhk", 0) or 0),
+        "property_age": int(data.get("property_age", 0) or 0),
+    }
+
+
+def canonicalize_prediction_input(data: dict, bundle):
+    """Normalize a prediction request and derive its base-price cache key.
+    The key uses the resolved one-hot column (unknown names share the 'other' slot) and leaves
+    out property_age unless the model uses it, so age variants share one model call. It starts
+    with the model version, so a price computed by a model being swapped out is never reused.
+    Raises ValueError/TypeError on non-numeric input.
+    """
+    canonical = canonical_prediction_fields(data)
+    feature_schema = bundle.feature_schema
+    key = (
+        bundle.version,
+        feature_schema.location_column(canonical["location"]),
+        canonical["total_sqft"],
+        canonical["bath"],
+        canonical["bhk"],
+        canonical["property_age"] if feature_schema.age_index is not None else None,
+    )
+    return canonical, key
+
+
 @app.route("/predict_price", methods=["POST"])
 def predict_price():
     try:
         data = request.get_json() or {}
-        print("📥 Received Data for Prediction:", data)
+        request_log("📥 Received Data for Prediction:", data)
 
-        if model is None or not data_columns:
+        # One bundle for the whole request, even if a new version is swapped in meanwhile
+        bundle = model_registry.active()
+        if bundle is None:
             return jsonify({"error": "Model or data columns not loaded."}), 500
 
-        # Build feature vector
-        features = np.zeros(len(data_columns))
-
-        # Numeric fields
         try:
-            if "total_sqft" in data_columns:
-                features[data_columns.index("total_sqft")] = float(data.get("total_sqft", 0) or 0)
-            if "bath" in data_columns:
-                features[data_columns.index("bath")] = int(data.get("bath", 0) or 0)
-            if "property_age" in data_columns:
-                features[data_columns.index("property_age")] = int(data.get("property_age", 0) or 0)
-            if "bhk" in data_columns:
-                features[data_columns.index("bhk")] = int(data.get("bhk", 0) or 0)
-        except Exception as e:
-            print(f"⚠️ Numeric conversion error: {e}")
+            with time_stage("feature_assembly"):
+                data, cache_key = canonicalize_prediction_input(data, bundle)
+        except (TypeError, ValueError) as e:
+            request_log(f"⚠️ Numeric conversion error: {e}")
             return jsonify({"error": "Invalid numeric input."}), 400
 
-        # Location one-hot
-        location = (data.get("location") or "").strip()
-        location_found = False
-        if location:
-            for idx, col in enumerate(data_columns):
-                if col.lower() == location.lower():
-                    features[idx] = 1
-                    location_found = True
-                    break
-
-        # If model isn't loaded, use a simple heuristic for base_price so endpoint remains testable
-        if model is None:
-            try:
-                sqft = float(data.get("total_sqft", 0) or 0)
-            except Exception:
-                sqft = 0
-            bhk = int(data.get("bhk", 0) or 0)
-            # Simple heuristic: base price in currency units (e.g., Rupees) ~ sqft * rate + bhk premium
-            base_price = sqft * 3000 + bhk * 200000
-        else:
-            # Predict base price with patch for sklearn compatibility if needed
+        # In-grid queries are a table lookup; everything else goes through the cache and model
+        base_price = None
+        if bundle.price_grid is not None:
+            base_price = bundle.price_grid.lookup(cache_key[1], data["total_sqft"], data["bath"], data["bhk"])
+            metrics.registry.inc("app_price_grid_lookups_total", help_text="Price grid lookups by result",
+                                 result="miss" if base_price is None else "hit")
+        if base_price is None:
+            base_price = prediction_cache.get(cache_key)
+        if base_price is None:
+            with time_stage("feature_vector"):
+                features = bundle.feature_schema.build_vector(data)
             try:
-                base_price = model.predict([features])[0]
+                base_price = float(predict_base_prices(bundle.model, features.reshape(1, -1))[0])
             except AttributeError as e:
-                # Compatibility hack for older sklearn-saved ensembles
-                if 'monotonic_cst' in str(e):
-                    def _patch_estimator(est):
-                        if not hasattr(est, 'monotonic_cst'):
-                            setattr(est, 'monotonic_cst', None)
-                        if hasattr(est, 'estimators_'):
-                            for sub in getattr(est, 'estimators_'):
-                                _patch_estimator(sub)
-                    _patch_estimator(model)
-                    base_price = model.predict([features])[0]
-                else:
-                    return jsonify({"error": str(e)}), 500
+                return jsonify({"error": str(e)}), 500
+            prediction_cache.put(cache_key, base_price)
 
         # Apply age depreciation (Model trained on new raw data, so we depreciate for age manually)
         age = int(data.get("property_age", 0) or 0)
@@ -180,9 +259,9 @@ def predict_price():
         # We removed manual location multipliers because the model now natively understands location value via one-hot encoding.
         final_price = base_price * age_factor
 
-        print(f"💰 Base Price: {base_price:.2f}")
-        print(f"🏗️ Age Factor: {age_factor:.2f} (Depreciation for {age} years)")
-        print(f"💵 Final Price: {final_price:.2f}")
+        request_log(f"💰 Base Price: {base_price:.2f}")
+        request_log(f"🏗️ Age Factor: {age_factor:.2f} (Depreciation for {age} years)")
+        request_log(f"💵 Final Price: {final_price:.2f}")
 
         return jsonify({
             "estimated_price": round(float(final_price), 2),
@@ -197,6 +276,68 @@ def predict_price():
         return jsonify({"error": str(e)}), 500
 
 
+MAX_BATCH_SIZE = 50000
+
+
+@app.route("/predict_price_batch", methods=["POST"])
+def predict_price_batch():
+    """Estimate prices for a list of properties with a single model call.
+    Expects {"properties": [{location, total_sqft, bath, bhk, property_age}, ...]}.
+    """
+    try:
+        data = request.get_json() or {}
+        items = data.get("properties")
+
+        bundle = model_registry.active()
+        if bundle is None:
+            return jsonify({"error": "Model or data columns not loaded."}), 500
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "'properties' must be a non-empty list."}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} properties)."}), 400
+
+        with time_stage("feature_assembly_batch"):
+            canonical = []
+            for i, item in enumerate(items):
+                try:
+                    canonical.append(canonical_prediction_fields(item))
+                except (AttributeError, TypeError, ValueError):
+                    return jsonify({"error": f"Invalid numeric input in property {i}."}), 400
+            X = bundle.feature_schema.build_sparse_matrix(canonical)
+
+        base_prices = predict_base_prices(bundle.model, X)
+        age_factors = np.array([calculate_age_factor(item["property_age"]) for item in canonical])
+        final_prices = base_prices * age_factors
+
+        request_log(f"📦 Batch prediction for {len(items)} properties")
+
+        return jsonify({
+            "predictions": [{
+                "estimated_price": round(float(final), 2),
+                "details": {
+                    "base_price": round(float(base), 2),
+                    "age_factor": round(float(factor), 2)
+                }
+            } for final, base, factor in zip(final_prices, base_prices, age_factors)]
+        })
+
+    except Exception as e:
+        print(f"❌ Error in Batch Prediction: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@admin_route("/admin/prediction_cache", methods=["GET"])
+def prediction_cache_stats():
+    """Hit/miss counters and occupancy of the base-price cache."""
+    return jsonify(prediction_cache.stats())
+
+
+@admin_route("/admin/model", methods=["GET"])
+def model_status():
+    """Active model version, when and how fast it loaded, and the state of the registry pointer."""
+    return jsonify(model_registry.status())
+
+
 @app.route("/")
 def index():
     """Serve main application page."""
@@ -215,44 +356,20 @@ def register_page():
     return render_template('register.html')
 
 
-def get_location_from_db(location_name):
-    """Fetch coordinates from SQLite database."""
-    conn = sqlite3.connect("house_prices.db")
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT latitude, longitude FROM heatmap_data WHERE TRIM(LOWER(location)) = LOWER(?)", (location_name.strip(),))
-    result = cursor.fetchone()
-    
-    conn.close()
-    return result if result else None
+geocode_repo = GeocodeRepository(app.config["GEOCODE_DB"], negative_ttl=app.config["GEOCODE_NEGATIVE_TTL"],
+                                 max_cached=app.config["GEOCODE_CACHE_MAX_ENTRIES"],
+                                 max_negative=app.config["GEOCODE_NEGATIVE_MAX_ENTRIES"])
+try:
+    print(f"✅ Loaded {geocode_repo.load_all()} geocoded locations into memory")
+except Exception as e:
+    print(f"⚠️ Could not preload geocoded locations: {e}")
+
 
 def fetch_from_osm(location_name):
-    """Fetches coordinates from OpenStreetMap API if not found in database."""
-    try:
-        response = requests.get(NOMINATIM_API_URL, params={"q": location_name, "format": "json"}, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+    """Fetches coordinates from OpenStreetMap API if not found in database (None if OSM has no match)."""
+    return osm_geocode(location_name, url=NOMINATIM_API_URL, timeout=5)
 
-        if data:
-            lat, lon = float(data[0]["lat"]), float(data[0]["lon"])
-            return lat, lon
-    except Exception as e:
-        print(f"🌍 OSM Fetch Error: {e}")
-    return None
 
-def save_location_to_db(location_name, lat, lon):
-    """Saves a new location to the database for future use."""
-    conn = sqlite3.connect("house_prices.db")
-    cursor = conn.cursor()
-    try:
-        cursor.execute("CREATE TABLE IF NOT EXISTS heatmap_data (id INTEGER PRIMARY KEY AUTOINCREMENT, location TEXT, latitude REAL, longitude REAL)")
-        cursor.execute("INSERT INTO heatmap_data (location, latitude, longitude) VALUES (?, ?, ?)", (location_name.strip(), lat, lon))
-        conn.commit()
-        print(f"✅ Saved {location_name} to database!")
-    except Exception as e:
-        print(f"❌ Failed to save location to DB: {e}")
-    finally:
-        conn.close()
 @app.route("/get_location_coords", methods=["GET"])
 def get_location_coords():
     location = request.args.get("location", "").strip()
@@ -260,45 +377,229 @@ def get_location_coords():
     if not location:
         return jsonify({"error": "Location not provided"}), 400
 
-    # First, check database
-    coords = get_location_from_db(location)
-    if coords:
-        return jsonify({"lat": coords[0], "lon": coords[1]})
-
-    # If not in DB, try OSM
-    coords = fetch_from_osm(location)
+    # Database first; on a miss one OSM lookup per name is shared by concurrent requests and saved
+    try:
+        coords = geocode_repo.resolve(location, fetch_from_osm)
+    except Exception as e:
+        print(f"❌ Failed to read location from DB: {e}")
+        coords = None
     if coords:
-        # Save for future
-        save_location_to_db(location, coords[0], coords[1])
         return jsonify({"lat": coords[0], "lon": coords[1]})
 
     return jsonify({"error": "Coordinates not found"}), 404
 
 
+@admin_route("/admin/geocode", methods=["GET"])
+def geocode_stats():
+    """Geocode cache sizes and how many lookups were coalesced onto an in-flight fetch."""
+    return jsonify(geocode_repo.stats())
+
+
+# Browser cache lifetime of /get_locations (revalidated with its ETag afterwards)
+app.config["LOCATIONS_CACHE_MAX_AGE"] = int(os.environ.get("LOCATIONS_CACHE_MAX_AGE", 300))
+
+# (source key, StaticPayload) of the last /get_locations body built
+_locations_payload = None
+
+
+def locations_payload(key, load_locations) -> StaticPayload:
+    """The /get_locations body for `key` (model version or columns file state), built once."""
+    global _locations_payload
+    cached = _locations_payload
+    if cached is None or cached[0] != key:
+        body = json.dumps({"locations": list(load_locations())}, separators=(",", ":")).encode()
+        cached = _locations_payload = (key, StaticPayload(body, "application/json",
+                                                          f"public, max-age={app.config['LOCATIONS_CACHE_MAX_AGE']}"))
+    return cached[1]
+
+
 @app.route('/get_locations', methods=['GET'])
 def get_locations():
-    """Return the list of locations used by the model (for populating the dropdown)."""
-    global locations
-    # If locations were not loaded at startup, try to read columns.json now
-    if not locations:
-        try:
-            if os.path.exists(columns_file):
-                with open(columns_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    cols = data.get('data_columns', [])
-                    if len(cols) > 3:
-                        locations = cols[3:]
-        except Exception as e:
-            print(f"❌ Failed to load locations from columns file: {e}")
+    """Return the list of locations used by the model (for populating the dropdown).
+    The body is serialized and compressed once per model version; repeat visits get a 304."""
+    bundle = model_registry.active()
+    if bundle is not None:
+        return locations_payload(("model", bundle.version), lambda: bundle.locations).response(request)
+
+    # If no model version could be loaded, fall back to the columns file CURRENT points to
+    # (parsed again only when the file changes)
+    try:
+        columns_file = model_registry.columns_path()
+        if os.path.exists(columns_file):
+            st = os.stat(columns_file)
+            key = ("columns", columns_file, st.st_mtime_ns, st.st_size)
+            return locations_payload(key, lambda: FeatureSchema.from_file(columns_file).locations).response(request)
+    except Exception as e:
+        print(f"❌ Failed to load locations from columns file: {e}")
+
+    return jsonify({"locations": []})
+
+
+# Front-end assets served from memory, pre-compressed; templates link them with ?v=<content hash>
+# so those URLs can be cached for STATIC_CACHE_MAX_AGE without ever serving a stale file
+app.config["STATIC_CACHE_MAX_AGE"] = int(os.environ.get("STATIC_CACHE_MAX_AGE", 365 * 24 * 3600))
+PRECOMPRESSED_ASSETS = {"app.js": "application/javascript", "app.css": "text/css", "auth.css": "text/css"}
+
+
+def load_static_payloads() -> dict:
+    payloads = {}
+    for filename, content_type in PRECOMPRESSED_ASSETS.items():
+        path = os.path.join(app.static_folder, filename)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                payloads[filename] = StaticPayload(f.read(), f"{content_type}; charset=utf-8")
+    return payloads
+
+
+static_payloads = load_static_payloads()
+_send_static_file = app.view_functions["static"]
+
+
+def serve_static(filename):
+    """Flask's static route, with the pre-compressed assets answered from memory."""
+    payload = static_payloads.get(filename)
+    if payload is None:
+        return _send_static_file(filename=filename)
+    versioned = request.args.get("v") == payload.digest
+    cache_control = f"public, max-age={app.config['STATIC_CACHE_MAX_AGE']}, immutable" if versioned else "no-cache"
+    return payload.response(request, cache_control)
+
+
+app.view_functions["static"] = serve_static
+
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    if endpoint == "static" and "v" not in values:
+        payload = static_payloads.get(values.get("filename"))
+        if payload is not None:
+            values["v"] = payload.digest
+
+
+overpass_client = OverpassClient(app.config["OVERPASS_ENDPOINTS"], mode=app.config["OVERPASS_FETCH_MODE"],
+                                 timeout=30, hedge_delay=app.config["OVERPASS_HEDGE_DELAY"])
+amenity_cache = AmenityTileCache(app.config["AMENITY_CACHE_DB"], precision=app.config["AMENITY_TILE_PRECISION"],
+                                 ttl=app.config["AMENITY_CACHE_TTL"], max_tiles=app.config["AMENITY_CACHE_MAX_TILES"])
+
+amenity_index = None
+if app.config["NEARBY_PLACES_SOURCE"] == "auto" and os.path.exists(app.config["AMENITY_INDEX_FILE"]):
+    try:
+        amenity_index = AmenityIndex.load(app.config["AMENITY_INDEX_FILE"])
+        print(f"✅ Offline amenity index loaded: {len(amenity_index)} places {amenity_index.counts()}")
+    except Exception as e:
+        print(f"❌ Failed to load amenity index, using Overpass: {e}")
+
+
+def overpass_filters(place_type: str) -> list:
+    """Map simple type keywords to Overpass tag filters (without the surrounding brackets)."""
+    t = place_type.lower()
+    if t in CATEGORY_FILTERS:
+        filters = CATEGORY_FILTERS[t]
+    else:
+        # Generic: try multiple tag types
+        filters = [
+            f'[amenity={t}]',
+            f'[building={t}]',
+            f'[shop={t}]'
+        ]
+    inner = []
+    for flt in filters:
+        # normalize filter string (remove surrounding brackets if present)
+        f_inner = flt.strip()
+        if f_inner.startswith('[') and f_inner.endswith(']'):
+            f_inner = f_inner[1:-1]
+        inner.append(f_inner)
+    return inner
+
+
+def fetch_nearby_elements(lat_f: float, lon_f: float, radius: int, place_type: str) -> list:
+    """Overpass elements of `place_type` within `radius` meters, served from the tile cache.
 
-    return jsonify({"locations": locations})
-cache = {}
+    Only tiles that are missing or stale are fetched, with a single bbox query over them; the
+    combined tile contents are then cut down to the exact radius locally.
+    """
+    tiles = amenity_cache.tiles_for(lat_f, lon_f, radius)
+    cached = amenity_cache.get_many(tiles, place_type)
+    missing = [geohash for geohash in tiles if geohash not in cached]
+    request_log(f"🗺️ Amenity tiles: {len(cached)} cached, {len(missing)} to fetch")
+
+    if missing:
+        bounds = [geohash_bounds(geohash) for geohash in missing]
+        south = min(b[0] for b in bounds)
+        west = min(b[1] for b in bounds)
+        north = max(b[2] for b in bounds)
+        east = max(b[3] for b in bounds)
+        bbox = f"{south:.6f},{west:.6f},{north:.6f},{east:.6f}"
+        # We'll search nodes, ways and relations for each filter inside the missing tiles
+        parts = []
+        for f_inner in overpass_filters(place_type):
+            parts.append(f"node({bbox})[{f_inner}];")
+            parts.append(f"way({bbox})[{f_inner}];")
+            parts.append(f"relation({bbox})[{f_inner}];")
+        overpass_query = f"[out:json][timeout:60];({''.join(parts)})\nout center qt;"
+        request_log(f"📝 Overpass query (tile bbox): {overpass_query}")
+
+        fetched, source_url = overpass_client.fetch(overpass_query)
+        if source_url is not None:
+            request_log(f"✅ Found {len(fetched)} results from {source_url}")
+            # Empty buckets are stored too, so quiet tiles are not re-fetched until they expire
+            filled = amenity_cache.split_into_tiles(fetched, missing)
+            amenity_cache.put_many(place_type, filled)
+            cached.update(filled)
+        else:
+            # Nothing came back (errors or an empty area): use what Overpass gave, cache nothing
+            cached.update(amenity_cache.split_into_tiles(fetched, missing))
+
+    elements = []
+    coords = []
+    for geohash in tiles:
+        for el in cached.get(geohash, ()):
+            c = element_coords(el)
+            if c is not None:
+                elements.append(el)
+                coords.append(c)
+    if not elements:
+        return []
+    coords = np.asarray(coords)
+    inside = haversine_meters(lat_f, lon_f, coords[:, 0], coords[:, 1]) <= radius
+    return [el for el, ok in zip(elements, inside) if ok]
+
+
+@admin_route('/admin/overpass_mirrors', methods=['GET'])
+def overpass_mirror_stats():
+    """Per-mirror latency and error rates, in the order mirrors will be tried next."""
+    order = overpass_client.ranked_endpoints()
+    return jsonify({
+        "mode": overpass_client.mode,
+        "order": order,
+        "mirrors": overpass_client.stats(),
+    })
+
+
+def nominatim_search(params: dict):
+    """Nominatim keyword search (timed per call); raises on HTTP errors."""
+    started = time.perf_counter()
+    try:
+        nom_resp = requests.get(NOMINATIM_API_URL, params=params, timeout=20, headers={'User-Agent': 'Bangalore Property App/1.0'})
+        nom_resp.raise_for_status()
+        nom_data = nom_resp.json()
+    except Exception:
+        observe_upstream("nominatim", NOMINATIM_API_URL, time.perf_counter() - started, "error")
+        raise
+    observe_upstream("nominatim", NOMINATIM_API_URL, time.perf_counter() - started, "ok" if nom_data else "empty")
+    return nom_data
+
+
+@admin_route('/admin/amenity_cache', methods=['GET'])
+def amenity_cache_stats():
+    """Tile count and hit rate of the nearby-places tile cache."""
+    return jsonify(amenity_cache.stats())
 
 
 @app.route('/get_nearby_places', methods=['GET'])
 def get_nearby_places():
     """Query Overpass API for nearby amenities around lat/lon."""
-    print("🔍 Starting nearby places search...")
+    request_log("🔍 Starting nearby places search...")
     
     lat = request.args.get('lat')
     lon = request.args.get('lon')
@@ -310,7 +611,7 @@ def get_nearby_places():
     except Exception:
         return jsonify({"error": "Invalid or missing lat/lon parameters"}), 400
 
-    print(f"📍 Searching near: {lat_f}, {lon_f} for type: {place_type}")
+    request_log(f"📍 Searching near: {lat_f}, {lon_f} for type: {place_type}")
     
     # radius in meters (increase for better coverage)
     requested_radius = int(request.args.get('radius', 5000))
@@ -320,116 +621,18 @@ def get_nearby_places():
     else:
         radius = min(requested_radius, 10000)
     if requested_radius > 10000:
-        print(f"⚠️ Requested radius {requested_radius}m exceeds 10000m; using 10000m cap.")
+        request_log(f"⚠️ Requested radius {requested_radius}m exceeds 10000m; using 10000m cap.")
 
     # optional sorting param (default: distance)
     sort_by = request.args.get('sort', 'distance')
 
-    # Haversine distance (meters)
-    from math import radians, sin, cos, sqrt, atan2
-    def haversine_meters(lat1, lon1, lat2, lon2):
-        # approximate radius of earth in meters
-        R = 6371000
-        phi1 = radians(lat1)
-        phi2 = radians(lat2)
-        dphi = radians(lat2 - lat1)
-        dlambda = radians(lon2 - lon1)
-        a = sin(dphi/2.0)**2 + cos(phi1)*cos(phi2)*sin(dlambda/2.0)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        return R * c
-    
-    # Map simple type keywords to Overpass filters
-    filters = []
     t = place_type.lower()
-    
-    if t == 'school':
-        filters = [
-            '[amenity~"school|college|university|kindergarten"]',
-            '[building~"school|college|university|education"]',
-            '[education=*]'
-        ]
-    elif t == 'hospital':
-        filters = [
-            '[amenity~"hospital|clinic|doctors|healthcare"]',
-            '[healthcare=*]',
-            '[medical=*]',
-            '[building=hospital]',
-            '[amenity=pharmacy]',
-            '[shop=pharmacy]'
-        ]
-    elif t == 'restaurant':
-        filters = [
-            '[amenity~"restaurant|cafe|fast_food|food_court"]',
-            '[cuisine=*]',
-            '[shop~"food|bakery"]'
-        ]
-    elif t == 'mall':
-        filters = [
-            '[shop~"mall|department_store|supermarket"]',
-            '[amenity=marketplace]',
-            '[building=retail]',
-            '[building=commercial]'
-        ]
+    if amenity_index is not None and t in CATEGORY_FILTERS:
+        with time_stage("amenity_index_query"):
+            elements = amenity_index.query(lat_f, lon_f, radius, t)
+        request_log(f"🗂️ Offline index returned {len(elements)} results")
     else:
-        # Generic: try multiple tag types
-        filters = [
-            f'[amenity={t}]',
-            f'[building={t}]',
-            f'[shop={t}]'
-        ]
-
-    # Build Overpass QL query using 'around' (radius in meters) to avoid bbox formatting issues
-    # We'll search nodes, ways and relations for each filter around the given lat/lon
-    parts = []
-    for flt in filters:
-        # normalize filter string (remove surrounding brackets if present)
-        f_inner = flt.strip()
-        if f_inner.startswith('[') and f_inner.endswith(']'):
-            f_inner = f_inner[1:-1]
-        # add node/way/relation parts
-        parts.append(f"node(around:{radius},{lat_f},{lon_f})[{f_inner}];")
-        parts.append(f"way(around:{radius},{lat_f},{lon_f})[{f_inner}];")
-        parts.append(f"relation(around:{radius},{lat_f},{lon_f})[{f_inner}];")
-
-    overpass_query = f"[out:json][timeout:60];({''.join(parts)})\nout center qt;"
-    print(f"📝 Overpass query (using around): {overpass_query}")
-
-    overpass_endpoints = [
-        "https://overpass-api.de/api/interpreter",
-        "https://overpass.kumi.systems/api/interpreter",
-        "https://lz4.overpass-api.de/api/interpreter"
-    ]
-
-    elements = []
-    last_error = None
-    
-    for overpass_url in overpass_endpoints:
-        try:
-            print(f"🔎 Querying Overpass at {overpass_url}")
-            headers = {'User-Agent': 'Bangalore Property App/1.0'}
-            resp = requests.post(overpass_url, 
-                              data={"data": overpass_query}, 
-                              headers=headers,
-                              timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            elements = data.get('elements', [])
-            if elements:
-                print(f"✅ Found {len(elements)} results from {overpass_url}")
-                break
-            print(f"⚠️ No results from {overpass_url}")
-        except Exception as e:
-            # Try to print response content when available for debugging
-            extra = ''
-            resp_obj = getattr(e, 'response', None)
-            try:
-                if resp_obj is not None and hasattr(resp_obj, 'text'):
-                    extra = f" Response text: {resp_obj.text[:500]}"
-            except Exception:
-                pass
-            print(f"⚠️ Overpass endpoint {overpass_url} failed: {e}{extra}")
-            last_error = e
-
+        elements = fetch_nearby_elements(lat_f, lon_f, radius, t)
 
     places = []
     for el in elements:
@@ -467,42 +670,27 @@ def get_nearby_places():
             if description:
                 name = f"{name} ({description})"
 
-            # compute distance and include it
-            try:
-                dist_m = haversine_meters(lat_f, lon_f, plat, plon)
-            except Exception:
-                dist_m = None
-
             places.append({
                 "name": name,
                 "lat": plat,
                 "lon": plon,
                 "type": place_type,
-                "distance_m": round(dist_m, 2) if dist_m is not None else None
+                "distance_m": None
             })
         except (TypeError, ValueError) as e:
-            print(f"⚠️ Error processing element: {e}")
+            request_log(f"⚠️ Error processing element: {e}")
             continue
 
-    # Deduplicate by (lat,lon,name) and limit results
-    seen = set()
-    deduped = []
-    for p in places:
-        key = (round(float(p['lat']), 5), round(float(p['lon']), 5), p['name'])
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(p)
-        if len(deduped) >= 50:
-            break
+    # Deduplicate by (lat,lon,name) and keep the 50 nearest (distances computed in one pass)
+    deduped = rank_places(places, lat_f, lon_f, k=50)
 
-    print(f"✅ Found {len(deduped)} places for type={place_type} within {radius}m")
+    request_log(f"✅ Found {len(deduped)} places for type={place_type} within {radius}m")
 
     # Use deduped results as starting point; if too few results, try Nominatim fallback
     final_places = list(deduped)
 
     if len(final_places) < 5:
-        print(f"⚠️ Few results from Overpass API, trying Nominatim for additional places...")
+        request_log(f"⚠️ Few results from Overpass API, trying Nominatim for additional places...")
         try:
             # compute approximate degree delta for given radius
             delta = radius / 111000.0  # rough conversion from meters to degrees
@@ -531,9 +719,7 @@ def get_nearby_places():
             }
 
             # Try Nominatim search (keyword) within the bounding box
-            nom_resp = requests.get(NOMINATIM_API_URL, params=nom_params, timeout=20, headers={'User-Agent': 'Bangalore Property App/1.0'})
-            nom_resp.raise_for_status()
-            nom_data = nom_resp.json()
+            nom_data = nominatim_search(nom_params)
             
             # If no results, try a looser keyword search without strict bounding to increase recall
             if not nom_data:
@@ -542,9 +728,7 @@ def get_nearby_places():
                     'format': 'json',
                     'limit': 50
                 }
-                nom_resp = requests.get(NOMINATIM_API_URL, params=nom_params, timeout=20, headers={'User-Agent': 'Bangalore Property App/1.0'})
-                nom_resp.raise_for_status()
-                nom_data = nom_resp.json()
+                nom_data = nominatim_search(nom_params)
             
             for item in nom_data:
                 try:
@@ -553,49 +737,29 @@ def get_nearby_places():
                     # Extract just the main part of the name, not the full address
                     display_name = item.get('display_name', '').split(',')[0]
                     name = display_name or f"Unnamed {place_type.title()}"
-                    
-                    # compute distance and include it
-                    try:
-                        dist_m = haversine_meters(lat_f, lon_f, plat, plon)
-                    except Exception:
-                        dist_m = None
 
                     places.append({
                         'name': name,
                         'lat': plat,
                         'lon': plon,
                         'type': place_type,
-                        'distance_m': round(dist_m, 2) if dist_m is not None else None
+                        'distance_m': None
                     })
                 except (TypeError, ValueError) as e:
-                    print(f"⚠️ Error processing Nominatim result: {e}")
+                    request_log(f"⚠️ Error processing Nominatim result: {e}")
                     continue
                     
-            print(f"✅ Added {len(nom_data)} places from Nominatim")
+            request_log(f"✅ Added {len(nom_data)} places from Nominatim")
 
             # merge nominatim results into final_places and deduplicate
-            all_places = final_places + places
-            seen = set()
-            merged = []
-            for p in all_places:
-                try:
-                    key = (round(float(p['lat']), 5), round(float(p['lon']), 5), p.get('name'))
-                except Exception:
-                    continue
-                if key in seen:
-                    continue
-                seen.add(key)
-                merged.append(p)
-                if len(merged) >= 50:
-                    break
-            final_places = merged
+            final_places = rank_places(final_places + places, lat_f, lon_f, k=50)
 
         except Exception as e:
             print(f"⚠️ Nominatim search failed: {e}")
             # keep what we have in final_places
 
     if not final_places:
-        print("⚠️ No places found from either source")
+        request_log("⚠️ No places found from either source")
         return jsonify({"places": []})
 
     # Sort results by distance (default) or other criteria
@@ -607,42 +771,139 @@ def get_nearby_places():
     except Exception as e:
         print(f"⚠️ Error sorting final_places: {e}")
 
-    print(f"✅ Returning {len(final_places)} total places after deduplication")
+    request_log(f"✅ Returning {len(final_places)} total places after deduplication")
     return jsonify({"places": final_places})
+def _cache_counters(field: str) -> dict:
+    """Running hit or miss totals of every in-process cache, keyed by the `cache` label."""
+    sources = {
+        "prediction": prediction_cache.stats(),
+        "amenity_tiles": amenity_cache.stats(),
+        "geocode": geocode_repo.stats(),
+    }
+    keys = {"hits": ("hits", "tile_hits", "hits"), "misses": ("misses", "tile_misses", "misses")}[field]
+    return {(("cache", name),): stats[key] for (name, stats), key in zip(sources.items(), keys)}
+
+
+def _cache_hit_ratio() -> dict:
+    hits, misses = _cache_counters("hits"), _cache_counters("misses")
+    return {key: round(hits[key] / (hits[key] + misses[key]), 4) if hits[key] + misses[key] else 0.0 for key in hits}
+
+
+metrics.registry.gauge("app_cache_hits_total", lambda: _cache_counters("hits"), "Cache hits by cache", kind="counter")
+metrics.registry.gauge("app_cache_misses_total", lambda: _cache_counters("misses"), "Cache misses by cache", kind="counter")
+metrics.registry.gauge("app_cache_hit_ratio", _cache_hit_ratio, "Hit ratio since start by cache")
+metrics.registry.gauge("app_geocode_coalesced_total", lambda: {(): geocode_repo.coalesced},
+                       "Geocode misses that waited on an in-flight lookup", kind="counter")
+
+
+def _model_info() -> dict:
+    bundle = model_registry.active()
+    return {(("version", bundle.version),): 1} if bundle is not None else {}
+
+
+metrics.registry.gauge("app_model_info", _model_info, "Active model version (value is always 1)")
+metrics.registry.gauge("app_model_load_seconds",
+                       lambda: {(): model_registry.active().load_seconds} if model_registry.active() else {},
+                       "Time the active model version took to load")
+metrics.registry.gauge("app_model_swaps_total", lambda: {(): model_registry.swaps}, "Model versions swapped in", kind="counter")
+
+
+@admin_route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Favorites pages (?limit=) and bulk save/delete requests are capped at these sizes; re-pricing
+# reads, predicts and updates favorites REPRICE_BATCH_SIZE rows at a time
+app.config["FAVORITES_PAGE_SIZE"] = int(os.environ.get("FAVORITES_PAGE_SIZE", 100))
+app.config["FAVORITES_MAX_PAGE_SIZE"] = int(os.environ.get("FAVORITES_MAX_PAGE_SIZE", 1000))
+app.config["FAVORITES_MAX_BULK"] = int(os.environ.get("FAVORITES_MAX_BULK", 1000))
+app.config["REPRICE_BATCH_SIZE"] = int(os.environ.get("REPRICE_BATCH_SIZE", 5000))
+
+FAVORITE_FIELDS = ("id", "location", "sqft", "bhk", "bath", "property_age", "price", "model_version")
+FAVORITE_COLUMNS = tuple(getattr(Favorite, name) for name in FAVORITE_FIELDS)
+
+
+def favorite_row(data: dict, user_id: int) -> dict:
+    """Column values for one favorite from a request item (the form sends propertyAge).
+    Raises KeyError/TypeError/ValueError on missing or non-numeric fields."""
+    age = data["propertyAge"] if "propertyAge" in data else data["property_age"]
+    location = data["location"]
+    if not isinstance(location, str) or not location.strip():
+        raise ValueError("location must be a non-empty string")
+    return {
+        "user_id": user_id,
+        "location": location,
+        "sqft": float(data["sqft"]),
+        "bhk": int(data["bhk"]),
+        "bath": int(data["bath"]),
+        "property_age": int(age),
+        "price": float(data["price"]),
+    }
+
+
 @app.route("/save_favorite", methods=["POST"])
 @login_required
 def save_favorite():
-    data = request.get_json()
+    data = request.get_json() or {}
+    try:
+        row = favorite_row(data, current_user.id)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid favorite: {e}"}), 400
 
-    new_fav = Favorite(
-        user_id=current_user.id,
-        location=data["location"],
-        sqft=data["sqft"],
-        bhk=data["bhk"],
-        bath=data["bath"],
-        property_age=data["propertyAge"],
-        price=data["price"]
-    )
-    db.session.add(new_fav)
+    db.session.add(Favorite(**row))
     db.session.commit()
     return jsonify({"message": "Property saved to favorites!"})
 
+
+@app.route("/save_favorites", methods=["POST"])
+@login_required
+def save_favorites():
+    """Save many favorites in one transaction. Expects {"favorites": [{location, sqft, bhk, bath,
+    propertyAge, price}, ...]}; nothing is saved if any item is invalid."""
+    items = (request.get_json() or {}).get("favorites")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "'favorites' must be a non-empty list."}), 400
+    if len(items) > app.config["FAVORITES_MAX_BULK"]:
+        return jsonify({"error": f"Too many favorites (max {app.config['FAVORITES_MAX_BULK']})."}), 400
+    try:
+        rows = [favorite_row(item, current_user.id) for item in items]
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({"error": f"Invalid favorite: {e}"}), 400
+
+    ids = db.session.scalars(insert(Favorite).returning(Favorite.id, sort_by_parameter_order=True), rows).all()
+    db.session.commit()
+    return jsonify({"message": f"{len(ids)} properties saved to favorites!", "ids": ids})
+
+
 @app.route("/get_favorites", methods=["GET"])
 @login_required
 def get_favorites():
-    favorites = Favorite.query.filter_by(user_id=current_user.id).all()
-    
-    fav_list = [{
-        "id": fav.id,
-        "location": fav.location,
-        "sqft": fav.sqft,
-        "bhk": fav.bhk,
-        "bath": fav.bath,
-        "property_age": fav.property_age,
-        "price": fav.price
-    } for fav in favorites]
-
-    return jsonify({"favorites": fav_list})
+    """One page of the user's favorites, oldest first.
+    Pass the returned next_cursor as ?cursor= for the following page (null on the last one);
+    ?format=rows returns {"fields": [...], "rows": [[...], ...]} instead of one object per favorite.
+    """
+    try:
+        limit = int(request.args.get("limit", app.config["FAVORITES_PAGE_SIZE"]))
+        cursor = int(request.args.get("cursor", 0) or 0)
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers."}), 400
+    limit = min(max(limit, 1), app.config["FAVORITES_MAX_PAGE_SIZE"])
+
+    # Keyset page on the (user_id, id) index; one extra row tells whether another page exists
+    rows = db.session.execute(
+        select(*FAVORITE_COLUMNS)
+        .where(Favorite.user_id == current_user.id, Favorite.id > cursor)
+        .order_by(Favorite.id)
+        .limit(limit + 1)
+    ).all()
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    if request.args.get("format") == "rows":
+        return jsonify({"fields": FAVORITE_FIELDS, "rows": [tuple(row) for row in rows], "next_cursor": next_cursor})
+    return jsonify({"favorites": [dict(zip(FAVORITE_FIELDS, row)) for row in rows], "next_cursor": next_cursor})
 
 @app.route("/delete_favorite/<int:fav_id>", methods=["DELETE"])
 @login_required
@@ -656,6 +917,91 @@ def delete_favorite(fav_id):
     return jsonify({"message": "Favorite deleted successfully"})
 
 
+@app.route("/delete_favorites", methods=["POST"])
+@login_required
+def delete_favorites():
+    """Delete many of the user's favorites in one statement. Expects {"ids": [...]}; ids that do
+    not exist or belong to someone else are skipped and reported back."""
+    ids = (request.get_json() or {}).get("ids")
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "'ids' must be a non-empty list."}), 400
+    if len(ids) > app.config["FAVORITES_MAX_BULK"]:
+        return jsonify({"error": f"Too many ids (max {app.config['FAVORITES_MAX_BULK']})."}), 400
+    try:
+        ids = sorted({int(i) for i in ids})
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers."}), 400
+
+    deleted = db.session.scalars(
+        delete(Favorite)
+        .where(Favorite.user_id == current_user.id, Favorite.id.in_(ids))
+        .returning(Favorite.id)
+    ).all()
+    db.session.commit()
+    missing = sorted(set(ids) - set(deleted))
+    return jsonify({"message": f"{len(deleted)} favorites deleted", "deleted": sorted(deleted), "not_found": missing})
+
+
+def reprice_favorites(user_id=None, stale_only: bool = True, batch_size: int = None) -> dict:
+    """Recompute saved prices with the active model: one user's favorites, or every row when
+    user_id is None. Rows are read in id order, priced with one model call per batch (same
+    features and age depreciation as /predict_price) and written back with a bulk UPDATE that
+    also records the model version. stale_only skips rows this version already priced.
+    Needs an app context; each batch is its own transaction.
+    """
+    bundle = model_registry.active()
+    if bundle is None:
+        raise RuntimeError("Model or data columns not loaded.")
+    batch_size = batch_size or app.config["REPRICE_BATCH_SIZE"]
+
+    query = select(Favorite.id, Favorite.location, Favorite.sqft, Favorite.bath, Favorite.bhk,
+                   Favorite.property_age, Favorite.price).order_by(Favorite.id).limit(batch_size)
+    if user_id is not None:
+        query = query.where(Favorite.user_id == user_id)
+    if stale_only:
+        query = query.where(db.or_(Favorite.model_version.is_(None), Favorite.model_version != bundle.version))
+
+    summary = {"model_version": bundle.version, "repriced": 0, "changed": 0, "batches": 0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(Favorite.id > last_id)).all()
+        if not rows:
+            break
+        ids, locations, sqft, bath, bhk, ages, old_prices = zip(*rows)
+        items = [{"location": loc, "total_sqft": round(area, app.config["SQFT_DECIMALS"]), "bath": n_bath, "bhk": n_bhk}
+                 for loc, area, n_bath, n_bhk in zip(locations, sqft, bath, bhk)]
+        with time_stage("feature_assembly_batch"):
+            X = bundle.feature_schema.build_sparse_matrix(items)
+        age_factors = np.fromiter((calculate_age_factor(age) for age in ages), dtype=float, count=len(ages))
+        prices = np.round(np.abs(predict_base_prices(bundle.model, X) * age_factors), 2)
+
+        db.session.execute(update(Favorite), [{"id": fav_id, "price": float(price), "model_version": bundle.version}
+                                              for fav_id, price in zip(ids, prices)])
+        db.session.commit()
+        summary["repriced"] += len(ids)
+        summary["changed"] += int(np.count_nonzero(prices != np.asarray(old_prices, dtype=float)))
+        summary["batches"] += 1
+        last_id = ids[-1]
+
+    metrics.registry.inc("app_favorites_repriced_total", summary["repriced"], "Favorites re-priced with the active model")
+    return summary
+
+
+@app.route("/reprice_favorites", methods=["POST"])
+@login_required
+def reprice_user_favorites():
+    """Re-price the user's saved properties with the current model in one batched pass.
+    Only rows not yet priced by the active version are touched unless ?all=1 is given."""
+    stale_only = request.args.get("all", "0").lower() in ("0", "false", "no", "off")
+    try:
+        summary = reprice_favorites(current_user.id, stale_only=stale_only)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 500
+    except ValueError as e:
+        return jsonify({"error": f"Invalid saved property: {e}"}), 500
+    return jsonify(summary)
+
+
 #create authentication routes
 @app.route("/register", methods=["POST"])
 def register():
@@ -700,6 +1046,31 @@ def check_session():
 # Ensure database tables exist
 with app.app_context():
     db.create_all()
+    # create_all() skips tables that already exist; add columns and indexes introduced since to older databases
+    favorite_columns = {column["name"] for column in sa_inspect(db.engine).get_columns(Favorite.__tablename__)}
+    if "model_version" not in favorite_columns:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {Favorite.__tablename__} ADD COLUMN model_version VARCHAR(64)"))
+        print("✅ Added favorite.model_version column")
+    for index in Favorite.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+
+def close_connections():
+    """Close the database handles opened while importing the app, so no SQLite connection or
+    pooled SQLAlchemy connection is shared between processes; each worker reopens its own lazily.
+    """
+    geocode_repo.close()
+    amenity_cache.close()
+    with app.app_context():
+        db.engine.dispose()
+
+
+def prepare_fork():
+    """Called by gunicorn.conf.py in the preloading master right before each worker is forked."""
+    # Replacement workers (max_requests, crashes) should start on the version CURRENT points to
+    model_registry.refresh()
+    close_connections()
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""Benchmark the serving hot paths in-process with the Flask test client.
+
+External services are replaced by local stand-in servers (a Nominatim that answers every
+query, an Overpass returning --overpass-elements places), and every database the app writes
+to is a temporary copy, so runs are repeatable and leave the working tree untouched.
+
+For each scenario it reports throughput, p50/p99 latency and the process's peak RSS so far.
+Results can be saved as a baseline and later runs compared against it:
+
+    python benchmarks/bench_serving.py --save benchmarks/baselines/serving.json
+    python benchmarks/bench_serving.py --compare benchmarks/baselines/serving.json [--tolerance 0.25]
+
+--compare exits with status 1 when a scenario's p50 or p99 got slower (or its throughput
+dropped) by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def start_stub(elements: list) -> str:
+    """One local server standing in for both Nominatim (GET) and Overpass (POST)."""
+    overpass_body = json.dumps({"elements": elements}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps([{"lat": "12.9716", "lon": "77.5946", "display_name": "Stub Place, Bengaluru"}]).encode()
+            self._send(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            self._send(overpass_body)
+
+        def _send(self, body: bytes):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def synthetic_elements(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    kinds = ["school", "college", "kindergarten", "university"]
+    return [{"type": "node", "id": i, "lat": 12.9716 + rng.uniform(-0.05, 0.05), "lon": 77.5946 + rng.uniform(-0.05, 0.05),
+             "tags": {"amenity": rng.choice(kinds), "name": f"Place {i}"}} for i in range(n)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def measure(fn, iterations: int, warmup: int) -> dict:
+    for i in range(warmup):
+        fn(i)
+    latencies = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(warmup + i)
+        latencies[i] = time.perf_counter() - t0
+    total = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "throughput_rps": round(iterations / total, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def check(resp, status: int = 200):
+    if resp.status_code != status:
+        raise RuntimeError(f"unexpected status {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return resp
+
+
+def build_scenarios(A, args) -> dict:
+    client = A.app.test_client()
+    locations = list(A.model_registry.active().locations) or ["whitefield"]
+    rng = random.Random(11)
+    singles = [{"location": rng.choice(locations), "total_sqft": rng.randint(400, 4000), "bath": rng.randint(1, 4),
+                "bhk": rng.randint(1, 4), "property_age": rng.randint(0, 20)} for _ in range(4096)]
+    batch = {"properties": [{"location": rng.choice(locations), "total_sqft": rng.uniform(400, 8000),
+                             "bath": rng.randint(1, 6), "bhk": rng.randint(1, 6)} for _ in range(args.batch_size)]}
+
+    # Favorites: one user with many rows, logged in on its own client
+    fav_client = A.app.test_client()
+    with A.app.app_context():
+        user = A.User(name="Bench", email="bench@example.com",
+                      password=A.bcrypt.generate_password_hash("bench").decode("utf-8"))
+        A.db.session.add(user)
+        A.db.session.commit()
+        A.db.session.bulk_insert_mappings(A.Favorite, [
+            {"user_id": user.id, "location": rng.choice(locations), "sqft": 1200.0, "bhk": 2, "bath": 2,
+             "property_age": 5, "price": 75.5} for _ in range(args.favorites)])
+        A.db.session.commit()
+    check(fav_client.post("/login", json={"email": "bench@example.com", "password": "bench"}))
+
+    def predict_single(i):
+        check(client.post("/predict_price", json=singles[i % len(singles)]))
+
+    def predict_uncached(i):
+        # Above the price grid's 5000 sqft ceiling and a new value each call, so the cache always misses too
+        item = dict(singles[i % len(singles)], total_sqft=5001 + i)
+        check(client.post("/predict_price", json=item))
+
+    def predict_batch(i):
+        check(client.post("/predict_price_batch", json=batch))
+
+    def get_locations(i):
+        check(client.get("/get_locations"))
+
+    # A repeat visitor: gzip accepted and the ETag from the previous visit
+    etag = client.get("/get_locations", headers={"Accept-Encoding": "gzip"}).headers.get("ETag", "")
+
+    def get_locations_revalidate(i):
+        check(client.get("/get_locations", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}), 304)
+
+    def coords_cached(i):
+        check(client.get("/get_location_coords", query_string={"location": locations[i % len(locations)]}))
+
+    def coords_osm(i):
+        # A name never seen before: single-flight miss, stub OSM call and upsert
+        check(client.get("/get_location_coords", query_string={"location": f"Bench Place {i}"}))
+
+    def nearby_cached(i):
+        check(client.get("/get_nearby_places", query_string={"lat": 12.9716, "lon": 77.5946, "type": "school", "radius": 5000}))
+
+    def nearby_overpass(i):
+        # TTL 0 makes every tile stale, so each call goes to the stub Overpass and re-tiles its answer
+        ttl = A.amenity_cache.ttl
+        A.amenity_cache.ttl = 0
+        try:
+            check(client.get("/get_nearby_places", query_string={"lat": 12.9716, "lon": 77.5946, "type": "school", "radius": 5000}))
+        finally:
+            A.amenity_cache.ttl = ttl
+
+    # First page of a user holding args.favorites rows (the endpoint is keyset-paginated)
+    page_size = A.app.config["FAVORITES_PAGE_SIZE"]
+
+    def favorites(i):
+        check(fav_client.get(f"/get_favorites?limit={page_size}"))
+
+    return {
+        "predict_price": predict_single,
+        "predict_price_uncached": predict_uncached,
+        f"predict_price_batch_{args.batch_size}": predict_batch,
+        "get_locations": get_locations,
+        "get_locations_304": get_locations_revalidate,
+        "get_location_coords_cached": coords_cached,
+        "get_location_coords_osm_stub": coords_osm,
+        "get_nearby_places_tile_cache": nearby_cached,
+        "get_nearby_places_overpass_stub": nearby_overpass,
+        f"get_favorites_page_{page_size}": favorites,
+    }
+
+
+# Scenarios whose calls are much heavier get fewer iterations
+HEAVY = ("predict_price_batch", "get_nearby_places_overpass_stub")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print per-scenario changes vs the baseline; True if nothing regressed beyond tolerance."""
+    ok = True
+    print(f"\n{'scenario':<36} {'p50 Δ':>9} {'p99 Δ':>9} {'rps Δ':>9}")
+    for name, cur in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<36} {'(new)':>9}")
+            continue
+        d50 = cur["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        d99 = cur["p99_ms"] / base["p99_ms"] - 1 if base["p99_ms"] else 0.0
+        drps = cur["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        regressed = d50 > tolerance or d99 > tolerance or drps < -tolerance
+        ok &= not regressed
+        flag = "  ❌ regression" if regressed else ""
+        print(f"{name:<36} {d50:>+8.1%} {d99:>+8.1%} {drps:>+8.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--favorites", type=int, default=5000, help="favorite rows for the benchmark user")
+    parser.add_argument("--overpass-elements", type=int, default=3000)
+    parser.add_argument("--only", default=None, help="comma-separated scenario name prefixes")
+    parser.add_argument("--save", default=None, help="write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown in --compare")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_serving_")
+    stub = start_stub(synthetic_elements(args.overpass_elements))
+    shutil.copy(os.path.join(ROOT, "house_prices.db"), os.path.join(scratch, "house_prices.db"))
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'users.db')}",
+        GEOCODE_DB=os.path.join(scratch, "house_prices.db"),
+        AMENITY_CACHE_DB=os.path.join(scratch, "amenity_cache.db"),
+        NOMINATIM_API_URL=stub + "/search",
+        OVERPASS_ENDPOINTS=stub + "/api/interpreter",
+        NEARBY_PLACES_SOURCE="live",
+        REQUEST_LOGGING="0",
+    )
+    os.chdir(ROOT)
+    try:
+        import app as A
+
+        results = {}
+        print(f"{'scenario':<36} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}")
+        for name, fn in build_scenarios(A, args).items():
+            if args.only and not any(name.startswith(p) for p in args.only.split(",")):
+                continue
+            heavy = name.startswith(HEAVY)
+            iterations = max(args.iterations // 5, 10) if heavy else args.iterations
+            r = results[name] = measure(fn, iterations, min(args.warmup, iterations))
+            print(f"{name:<36} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_rss_mb']:>12.1f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+                "scenarios": results,
+            }, f, indent=2)
+        print(f"✅ Results saved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
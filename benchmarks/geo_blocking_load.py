@@ -0,0 +1,162 @@
+"""Show that hanging geo lookups no longer starve /predict_price.
+
+Starts a stand-in Nominatim/Overpass server that holds every request for --hang seconds, then
+runs the app under gunicorn once per worker class with the geo upstreams pointed at it. For
+each run it measures /predict_price latency alone, then again while --geo-clients keep
+/get_location_coords and /get_nearby_places requests hanging.
+
+Usage: python benchmarks/geo_blocking_load.py [--worker-classes sync,gevent] [--hang 4] [--geo-clients 8] [--duration 10]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_hanging_upstream(hang: float) -> str:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            time.sleep(hang)
+            body = b'{"elements": []}' if self.command == "POST" else b"[]"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def http(url: str, payload=None, timeout: float = 60.0):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+    except urllib.error.HTTPError:
+        pass
+
+
+def predict_latencies(base: str, duration: float, interval: float, timeout: float) -> list:
+    """Sequential /predict_price latencies (ms) for `duration` seconds; a request that gets no
+    answer within `timeout` is recorded as the timeout."""
+    payload = {"total_sqft": 1200, "bath": 2, "bhk": 2, "location": "Whitefield"}
+    out = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        started = time.perf_counter()
+        try:
+            http(base + "/predict_price", payload, timeout=timeout)
+        except Exception:
+            pass
+        out.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+    return out
+
+
+def summary(latencies) -> str:
+    a = np.asarray(latencies)
+    return f"{len(a):4d} req   p50 {np.percentile(a, 50):7.1f} ms   p99 {np.percentile(a, 99):7.1f} ms   max {a.max():7.1f} ms"
+
+
+def run(worker_class: str, args, upstream: str, scratch: str):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, NOMINATIM_API_URL=upstream + "/search", OVERPASS_ENDPOINTS=upstream + "/api/interpreter",
+               OVERPASS_FETCH_MODE="sequential", NEARBY_PLACES_SOURCE="live",
+               AMENITY_CACHE_DB=os.path.join(scratch, f"amenity_{worker_class}.db"),
+               GEOCODE_DB=os.path.join(scratch, f"house_prices_{worker_class}.db"),
+               DATABASE_URL=f"sqlite:///{os.path.join(scratch, f'users_{worker_class}.db')}")
+    # The geo routes upsert their lookups; keep them out of the tracked database
+    shutil.copy(os.path.join(ROOT, "house_prices.db"), env["GEOCODE_DB"])
+    cmd = [sys.executable, "-m", "gunicorn", "--worker-class", worker_class, "--workers", str(args.workers),
+           "--bind", f"127.0.0.1:{port}", "--timeout", "120", "--log-level", "warning", "app:app"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                http(base + "/get_locations", timeout=2)
+                break
+            except Exception:
+                if time.time() > deadline or proc.poll() is not None:
+                    raise SystemExit(f"❌ gunicorn ({worker_class}) did not come up")
+                time.sleep(0.3)
+
+        predict_latencies(base, 1, 0, args.predict_timeout)
+        idle = predict_latencies(base, args.duration, args.interval, args.predict_timeout)
+
+        stop = threading.Event()
+
+        def geo_client(i):
+            while not stop.is_set():
+                if i % 2:
+                    http(base + f"/get_location_coords?location=Nowhere%20{i}%20{time.time()}")
+                else:
+                    http(base + f"/get_nearby_places?lat={12.9 + i * 0.01}&lon=77.6&type=school&radius=1000")
+
+        pool = ThreadPoolExecutor(max_workers=args.geo_clients)
+        for i in range(args.geo_clients):
+            pool.submit(geo_client, i)
+        time.sleep(0.5)
+        busy = predict_latencies(base, args.duration, args.interval, args.predict_timeout)
+        stop.set()
+        print(f"{worker_class:>8}  idle: {summary(idle)}")
+        print(f"{'':>8}  geo hanging ({args.geo_clients} clients): {summary(busy)}")
+        pool.shutdown(wait=False, cancel_futures=True)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--worker-classes", default="sync,gevent")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--hang", type=float, default=4.0, help="seconds the stand-in upstream holds each request")
+    parser.add_argument("--geo-clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per measurement phase")
+    parser.add_argument("--predict-timeout", type=float, default=10.0, help="client timeout for /predict_price (s)")
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    upstream = start_hanging_upstream(args.hang)
+    scratch = tempfile.mkdtemp(prefix="geo_load_")
+    try:
+        for worker_class in args.worker_classes.split(","):
+            run(worker_class.strip(), args, upstream, scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
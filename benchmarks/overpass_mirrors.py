@@ -0,0 +1,77 @@
+"""Exercise OverpassClient against local stand-in Overpass mirrors.
+
+Starts three HTTP servers on localhost: a slow mirror, a failing mirror and a fast mirror
+(in that configured order), then times repeated fetches in each mode and prints the
+per-mirror stats the client learned.
+
+Usage: python benchmarks/overpass_mirrors.py [--slow 3.0] [--fast 0.2] [--hedge-delay 0.5] [--queries 5]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from overpass_client import FETCH_MODES, OverpassClient  # noqa: E402
+
+ELEMENTS = [{"type": "node", "id": i, "lat": 12.97 + i * 1e-4, "lon": 77.59, "tags": {"amenity": "school", "name": f"School {i}"}}
+            for i in range(200)]
+
+
+def make_handler(delay: float, status: int):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            body = json.dumps({"elements": ELEMENTS} if status == 200 else {"error": "stand-in failure"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+def start_mirror(delay: float, status: int) -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(delay, status))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/api/interpreter"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slow", type=float, default=3.0, help="latency of the slow mirror (s)")
+    parser.add_argument("--fast", type=float, default=0.2, help="latency of the fast mirror (s)")
+    parser.add_argument("--hedge-delay", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=5)
+    args = parser.parse_args()
+
+    endpoints = [start_mirror(args.slow, 200), start_mirror(0.05, 500), start_mirror(args.fast, 200)]
+    names = dict(zip(endpoints, ["slow", "failing", "fast"]))
+
+    for mode in FETCH_MODES:
+        client = OverpassClient(endpoints, mode=mode, timeout=10, hedge_delay=args.hedge_delay)
+        latencies = []
+        winners = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            elements, url = client.fetch("[out:json];node(around:1000,12.97,77.59)[amenity=school];out;")
+            latencies.append(time.perf_counter() - start)
+            winners.append(f"{names.get(url, 'none')}({len(elements)})")
+        print(f"\n⏱️ {mode:>10}: first {latencies[0]:.2f}s, then mean {sum(latencies[1:]) / max(len(latencies) - 1, 1):.2f}s  winners: {' '.join(winners)}")
+        print(f"   next order: {[names[u] for u in client.ranked_endpoints()]}")
+        for s in client.stats():
+            print(f"   {names[s['url']]:>8}: {s['requests']} req, error rate {s['error_rate']:.2f}, ewma {s['ewma_latency_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Time each training preprocessing stage on 1x / 10x / 100x synthetic copies of BHP.csv.
+
+With --legacy, the previous loop/apply-based implementations of the same stages are timed
+alongside for comparison.
+
+Usage: python benchmarks/preprocessing_scaling.py [--scales 1,10,100] [--legacy]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import train_optimized_model as T  # noqa: E402
+
+
+# --- Previous implementations, kept only as a timing reference ---
+
+def legacy_clean_data(df):
+    df = df.drop(['area_type', 'society', 'balcony', 'availability'], axis='columns').dropna()
+
+    def convert(x):
+        tokens = str(x).split('-')
+        if len(tokens) == 2:
+            return (float(tokens[0]) + float(tokens[1])) / 2
+        try:
+            return float(x)
+        except ValueError:
+            return None
+
+    df = df.copy()
+    df['total_sqft'] = df['total_sqft'].apply(convert)
+    df['bhk'] = df['size'].apply(lambda x: int(x.split(' ')[0]))
+    df = df.dropna().copy()
+    df['price_per_sqft'] = df['price'] * 100000 / df['total_sqft']
+    df['location'] = df['location'].apply(lambda x: x.strip())
+    stats = df['location'].value_counts()
+    rare = stats[stats <= T.MIN_LOCATION_COUNT]
+    df['location'] = df['location'].apply(lambda x: 'other' if x in rare else x)
+    return df
+
+
+def legacy_remove_pps_outliers(df):
+    df_out = pd.DataFrame()
+    for _, subdf in df.groupby('location'):
+        m = np.mean(subdf.price_per_sqft)
+        st = np.std(subdf.price_per_sqft)
+        reduced_df = subdf[(subdf.price_per_sqft > (m - st)) & (subdf.price_per_sqft <= (m + st))]
+        df_out = pd.concat([df_out, reduced_df], ignore_index=True)
+    return df_out
+
+
+def legacy_remove_bhk_outliers(df):
+    exclude_indices = np.array([])
+    for _, location_df in df.groupby('location'):
+        bhk_stats = {}
+        for bhk, bhk_df in location_df.groupby('bhk'):
+            bhk_stats[bhk] = {'mean': np.mean(bhk_df.price_per_sqft), 'count': bhk_df.shape[0]}
+        for bhk, bhk_df in location_df.groupby('bhk'):
+            stats = bhk_stats.get(bhk - 1)
+            if stats and stats['count'] > 5:
+                exclude_indices = np.append(exclude_indices, bhk_df[bhk_df.price_per_sqft < stats['mean']].index.values)
+    return df.drop(exclude_indices, axis='index')
+
+
+STAGES = [
+    ("clean_data", T.clean_data, legacy_clean_data),
+    ("remove_small_units", T.remove_small_units, T.remove_small_units),
+    ("remove_pps_outliers", T.remove_pps_outliers, legacy_remove_pps_outliers),
+    ("remove_bhk_outliers", T.remove_bhk_outliers, legacy_remove_bhk_outliers),
+]
+
+
+def run_pipeline(df, use_legacy):
+    timings = {}
+    for name, current, legacy in STAGES:
+        fn = legacy if use_legacy else current
+        start = time.perf_counter()
+        df = fn(df)
+        timings[name] = time.perf_counter() - start
+    start = time.perf_counter()
+    T.build_features(df.drop(['price_per_sqft'], axis='columns'))
+    timings["build_features"] = time.perf_counter() - start
+    return timings, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--legacy", action="store_true", help="also time the previous implementations")
+    args = parser.parse_args()
+
+    base = pd.read_csv(os.path.join(ROOT, T.DATA_FILE))
+    variants = [("vectorized", False)] + ([("legacy", True)] if args.legacy else [])
+
+    print(f"{'rows':>10} {'impl':>10} " + " ".join(f"{name:>20}" for name, _, _ in STAGES) + f" {'build_features':>15} {'total':>9}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        df = pd.concat([base] * scale, ignore_index=True)
+        for label, use_legacy in variants:
+            timings, kept = run_pipeline(df, use_legacy)
+            cells = " ".join(f"{timings[name]:>19.3f}s" for name, _, _ in STAGES)
+            print(f"{len(df):>10} {label:>10} {cells} {timings['build_features']:>14.3f}s {sum(timings.values()):>8.3f}s  ({kept} rows kept)")
+
+
+if __name__ == "__main__":
+    main()
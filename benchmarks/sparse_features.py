@@ -0,0 +1,97 @@
+"""Compare the dense and sparse (CSR) feature paths: memory and throughput.
+
+Serving: batch feature assembly (FeatureSchema.build_matrix vs build_sparse_matrix) and
+native-forest prediction on the result. Training: FeatureStore.to_matrix vs to_csr on
+BHP.csv replicated --train-scale times, optionally with a forest fit (--fit).
+
+Usage: python benchmarks/sparse_features.py [--batch 20000] [--train-scale 10] [--fit]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import train_optimized_model as T  # noqa: E402
+from feature_schema import FeatureSchema  # noqa: E402
+from feature_store import FeatureStore  # noqa: E402
+from forest_model import ForestModel  # noqa: E402
+
+
+def matrix_bytes(X) -> int:
+    if hasattr(X, "indptr"):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def serving(batch: int):
+    schema = FeatureSchema.from_file(T.COLUMNS_FILE)
+    forest = ForestModel.load(T.OUTPUT_FOREST_DIR)
+    rng = np.random.default_rng(0)
+    names = list(schema.locations) + ["somewhere else"]
+    items = [{
+        "location": names[i],
+        "total_sqft": float(sqft),
+        "bath": int(bath),
+        "bhk": int(bhk),
+    } for i, sqft, bath, bhk in zip(rng.integers(0, len(names), batch), rng.integers(400, 4000, batch),
+                                    rng.integers(1, 5, batch), rng.integers(1, 5, batch))]
+
+    print(f"\n🔧 Serving: batch of {batch} properties, {schema.n_features} features")
+    print(f"{'path':>8} {'assembly':>12} {'matrix':>10} {'predict':>12} {'rows/s':>12}")
+    results = {}
+    for label, build in (("dense", schema.build_matrix), ("sparse", schema.build_sparse_matrix)):
+        X, t_build = timed(lambda: build(items))
+        pred, t_pred = timed(lambda: forest.predict(X), repeat=1)
+        results[label] = pred
+        print(f"{label:>8} {t_build * 1000:>10.1f}ms {matrix_bytes(X) / 1e6:>8.2f}MB {t_pred * 1000:>10.1f}ms {batch / (t_build + t_pred):>12.0f}")
+    print(f"   identical predictions: {np.array_equal(results['dense'], results['sparse'])}")
+
+
+def training(scale: int, fit: bool):
+    df = pd.concat([pd.read_csv(T.DATA_FILE)] * scale, ignore_index=True)
+    clean = T.preprocess(df)
+    codes, locations = pd.factorize(clean["location"], sort=True)
+    store = FeatureStore.from_arrays(codes, clean["total_sqft"], clean["bath"], clean["bhk"], clean["price"], list(locations))
+
+    print(f"\n🏋️ Training matrix: {len(store)} rows x {len(store.columns)} columns (BHP.csv x{scale})")
+    print(f"{'path':>8} {'build':>10} {'matrix':>10}" + (f" {'fit':>10}" if fit else ""))
+    for label, build in (("dense", store.to_matrix), ("sparse", store.to_csr)):
+        X, t_build = timed(build)
+        line = f"{label:>8} {t_build * 1000:>8.1f}ms {matrix_bytes(X) / 1e6:>8.2f}MB"
+        if fit:
+            from sklearn.ensemble import RandomForestRegressor
+            start = time.perf_counter()
+            RandomForestRegressor(n_estimators=100, max_depth=12, random_state=10, n_jobs=-1).fit(X, store.price)
+            line += f" {time.perf_counter() - start:>9.1f}s"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=20000)
+    parser.add_argument("--train-scale", type=int, default=10)
+    parser.add_argument("--fit", action="store_true", help="also time a forest fit on each matrix")
+    args = parser.parse_args()
+    serving(args.batch)
+    training(args.train_scale, args.fit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Per-worker memory and cold-start time of the gunicorn setup, with and without preload.
+
+Starts `gunicorn --config gunicorn.conf.py app:app` once per mode (GUNICORN_PRELOAD=0 / 1) with
+--workers workers, sends some traffic, then reads every worker's RSS, PSS (RSS with shared pages
+split between the processes sharing them) and USS (private pages) from /proc. Cold start is the
+time from launch until the last worker logged "ready"; respawn is how long a replacement for a
+killed worker took to get ready. Linux only (/proc/<pid>/smaps_rollup).
+
+Usage: python benchmarks/worker_memory.py [--workers 4] [--requests 300] [--modes 0,1]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY = re.compile(r"Worker (\d+) ready in ([\d.]+)s")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid: int) -> dict:
+    """Rss/Pss and private (USS) kB of one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {"rss": fields["Rss"], "pss": fields["Pss"],
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+def children(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def post(url: str, payload: dict):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        resp.read()
+
+
+class Server:
+    """A gunicorn process whose log lines are collected (with arrival times) on a thread."""
+
+    def __init__(self, preload: bool, args, scratch: str):
+        self.port = free_port()
+        env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0", WEB_CONCURRENCY=str(args.workers),
+                   GUNICORN_MAX_REQUESTS="0", REQUEST_LOGGING="0",
+                   DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'users.db')}",
+                   GEOCODE_DB=os.path.join(scratch, "house_prices.db"),
+                   AMENITY_CACHE_DB=os.path.join(scratch, "amenity_cache.db"))
+        cmd = [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "--bind", f"127.0.0.1:{self.port}",
+               "--log-level", "info", "app:app"]
+        self.ready = []
+        self._cond = threading.Condition()
+        self.started = time.monotonic()
+        self.proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        threading.Thread(target=self._read_log, daemon=True).start()
+
+    def _read_log(self):
+        for line in self.proc.stderr:
+            m = READY.search(line)
+            if m:
+                with self._cond:
+                    self.ready.append((int(m.group(1)), float(m.group(2)), time.monotonic()))
+                    self._cond.notify_all()
+
+    def wait_ready(self, count: int, timeout: float = 120):
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self.ready) >= count, timeout):
+                raise SystemExit(f"❌ only {len(self.ready)}/{count} workers got ready")
+            return self.ready[count - 1]
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait(timeout=30)
+
+
+def run(preload: bool, args, scratch: str) -> dict:
+    server = Server(preload, args, scratch)
+    try:
+        server.wait_ready(args.workers)
+        cold_start = max(t for _, _, t in server.ready) - server.started
+
+        base = f"http://127.0.0.1:{server.port}"
+        items = [{"location": "Whitefield", "total_sqft": 600 + 7 * i, "bath": 2, "bhk": 2} for i in range(args.requests)]
+        for item in items:
+            post(base + "/predict_price", item)
+        post(base + "/predict_price_batch", {"properties": items})
+
+        workers = children(server.proc.pid)
+        per_worker = [memory_kb(pid) for pid in workers]
+        master = memory_kb(server.proc.pid)
+
+        # Respawn: the master forks a replacement for a killed worker
+        os.kill(workers[0], signal.SIGKILL)
+        _, respawn, _ = server.wait_ready(args.workers + 1)
+    finally:
+        server.stop()
+
+    n = len(per_worker)
+    return {
+        "mode": "preload" if preload else "no preload",
+        "cold_start_s": cold_start,
+        "respawn_s": respawn,
+        "worker_rss_mb": sum(m["rss"] for m in per_worker) / n / 1024,
+        "worker_pss_mb": sum(m["pss"] for m in per_worker) / n / 1024,
+        "worker_uss_mb": sum(m["uss"] for m in per_worker) / n / 1024,
+        "total_pss_mb": (sum(m["pss"] for m in per_worker) + master["pss"]) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=300, help="/predict_price calls before measuring")
+    parser.add_argument("--modes", default="0,1", help="GUNICORN_PRELOAD values to compare")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="worker_memory_")
+    shutil.copy(os.path.join(ROOT, "house_prices.db"), os.path.join(scratch, "house_prices.db"))
+    try:
+        results = [run(mode.strip() == "1", args, scratch) for mode in args.modes.split(",")]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"\n{args.workers} workers")
+    print(f"{'mode':<12} {'cold start s':>12} {'respawn s':>10} {'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'total PSS MB':>13}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['cold_start_s']:>12.2f} {r['respawn_s']:>10.3f} {r['worker_rss_mb']:>8.1f} "
+              f"{r['worker_pss_mb']:>8.1f} {r['worker_uss_mb']:>8.1f} {r['total_pss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
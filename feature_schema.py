@@ -0,0 +1,133 @@
+"""Feature layout of the price model, built once from columns.json at model load."""
+import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+NUMERIC_COLUMNS = ("total_sqft", "bath", "bhk", "property_age")
+
+
+def normalize_location(name) -> str:
+    """Canonical (case-folded, trimmed) form of a location name used for lookups."""
+    return str(name or "").strip().casefold()
+
+
+@dataclass(frozen=True)
+class FeatureSchema:
+    """Immutable column layout: fixed numeric offsets plus a location -> one-hot column map."""
+    columns: Tuple[str, ...]
+    sqft_index: Optional[int]
+    bath_index: Optional[int]
+    bhk_index: Optional[int]
+    age_index: Optional[int]
+    locations: Tuple[str, ...]
+    location_index: Mapping[str, int] = field(repr=False)
+
+    @classmethod
+    def from_columns(cls, columns) -> "FeatureSchema":
+        columns = tuple(columns)
+        offsets = {name: (columns.index(name) if name in columns else None) for name in NUMERIC_COLUMNS}
+        location_index = {}
+        location_names = []
+        for idx, col in enumerate(columns):
+            if col in NUMERIC_COLUMNS:
+                continue
+            location_names.append(col)
+            # First column wins if two names only differ by case, matching the old linear scan
+            location_index.setdefault(normalize_location(col), idx)
+        return cls(
+            columns=columns,
+            sqft_index=offsets["total_sqft"],
+            bath_index=offsets["bath"],
+            bhk_index=offsets["bhk"],
+            age_index=offsets["property_age"],
+            locations=tuple(location_names),
+            location_index=MappingProxyType(location_index),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "FeatureSchema":
+        with open(path, "r", encoding="utf-8") as f:
+            columns = json.load(f)["data_columns"]
+        if len(columns) < 4:
+            raise ValueError("❌ Invalid data_columns format. Expected at least 4 columns (sqft, bath, bhk, property_age, locations).")
+        return cls.from_columns(columns)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    def location_column(self, location) -> Optional[int]:
+        """Column index of the location's one-hot slot, or None for unknown/'other' locations."""
+        return self.location_index.get(normalize_location(location))
+
+    def build_vector(self, data: dict) -> np.ndarray:
+        """Feature vector for one property dict. Raises ValueError/TypeError on non-numeric input."""
+        features = np.zeros(self.n_features)
+        if self.sqft_index is not None:
+            features[self.sqft_index] = float(data.get("total_sqft", 0) or 0)
+        if self.bath_index is not None:
+            features[self.bath_index] = int(data.get("bath", 0) or 0)
+        if self.bhk_index is not None:
+            features[self.bhk_index] = int(data.get("bhk", 0) or 0)
+        if self.age_index is not None:
+            features[self.age_index] = int(data.get("property_age", 0) or 0)
+        loc_idx = self.location_column(data.get("location"))
+        if loc_idx is not None:
+            features[loc_idx] = 1
+        return features
+
+    def _parse_items(self, items: list):
+        """Numeric fields (n x 4: sqft, bath, bhk, age) and one-hot column (-1 if none) per item."""
+        n = len(items)
+        numeric = np.empty((n, 4))
+        loc_idx = np.full(n, -1, dtype=np.intp)
+        for i, item in enumerate(items):
+            try:
+                numeric[i] = (
+                    float(item.get("total_sqft", 0) or 0),
+                    int(item.get("bath", 0) or 0),
+                    int(item.get("bhk", 0) or 0),
+                    int(item.get("property_age", 0) or 0),
+                )
+            except (AttributeError, TypeError, ValueError) as e:
+                raise ValueError(f"item {i}: {e}")
+            col = self.location_index.get(normalize_location(item.get("location")))
+            if col is not None:
+                loc_idx[i] = col
+        return numeric, loc_idx
+
+    def _numeric_slots(self):
+        return [(j, idx) for j, idx in enumerate((self.sqft_index, self.bath_index, self.bhk_index, self.age_index))
+                if idx is not None]
+
+    def build_matrix(self, items: list) -> np.ndarray:
+        """Dense feature matrix for a list of property dicts.
+        Raises ValueError (with the offending item index) on invalid input.
+        """
+        numeric, loc_idx = self._parse_items(items)
+        X = np.zeros((len(items), self.n_features))
+        for j, idx in self._numeric_slots():
+            X[:, idx] = numeric[:, j]
+        rows = np.nonzero(loc_idx >= 0)[0]
+        X[rows, loc_idx[rows]] = 1
+        return X
+
+    def build_sparse_matrix(self, items: list) -> sp.csr_matrix:
+        """CSR feature matrix: the numeric slots plus at most one one-hot entry per row.
+        Raises ValueError (with the offending item index) on invalid input.
+        """
+        numeric, loc_idx = self._parse_items(items)
+        n = len(items)
+        slots = self._numeric_slots()
+        rows = np.repeat(np.arange(n), len(slots))
+        cols = np.tile([idx for _, idx in slots], n)
+        vals = numeric[:, [j for j, _ in slots]].ravel()
+        has_loc = np.nonzero(loc_idx >= 0)[0]
+        rows = np.concatenate([rows, has_loc])
+        cols = np.concatenate([cols, loc_idx[has_loc]])
+        vals = np.concatenate([vals, np.ones(len(has_loc))])
+        return sp.csr_matrix((vals, (rows, cols)), shape=(n, self.n_features))
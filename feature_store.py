@@ -0,0 +1,139 @@
+"""Compact, typed training feature store and mergeable per-group statistics.
+
+The store keeps one row per listing with the location as an integer category code instead of
+a one-hot block, so its size scales with rows only (16 bytes per row).
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+NUMERIC_FEATURES = ("total_sqft", "bath", "bhk")
+
+
+def group_moments(values, keys) -> pd.DataFrame:
+    """Count, mean and M2 (sum of squared deviations) of `values` per key, indexed by key."""
+    values = pd.Series(np.asarray(values, dtype=np.float64))
+    grouped = values.groupby(np.asarray(keys), sort=False)
+    mean = grouped.transform('mean')
+    out = pd.DataFrame({
+        'count': grouped.size(),
+        'mean': grouped.mean(),
+        'm2': ((values - mean) ** 2).groupby(np.asarray(keys), sort=False).sum(),
+    })
+    out['count'] = out['count'].astype(np.int64)
+    return out
+
+
+def combine_moments(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Merge two group_moments frames (Chan et al. parallel update); keys may differ."""
+    if a is None or a.empty:
+        return b.copy()
+    index = a.index.union(b.index)
+    a = a.reindex(index, fill_value=0)
+    b = b.reindex(index, fill_value=0)
+    n = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+    safe_n = n.where(n > 0, 1)
+    return pd.DataFrame({
+        'count': n.astype(np.int64),
+        'mean': a['mean'] + delta * b['count'] / safe_n,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / safe_n,
+    }, index=index)
+
+
+def moments_std(stats: pd.DataFrame) -> pd.Series:
+    """Population standard deviation from a group_moments frame."""
+    return np.sqrt(stats['m2'] / stats['count'].where(stats['count'] > 0, 1))
+
+
+class FeatureStore:
+    """Typed columns for the cleaned training rows plus the location vocabulary."""
+
+    def __init__(self, location_code, total_sqft, bath, bhk, price, locations):
+        self.location_code = location_code
+        self.total_sqft = total_sqft
+        self.bath = bath
+        self.bhk = bhk
+        # Target stays float64 so leaf values match a model trained on the raw prices
+        self.price = price
+        self.locations = list(locations)
+
+    @classmethod
+    def from_arrays(cls, location_code, total_sqft, bath, bhk, price, locations) -> "FeatureStore":
+        code_dtype = np.int16 if len(locations) < np.iinfo(np.int16).max else np.int32
+        return cls(
+            np.asarray(location_code, dtype=code_dtype),
+            np.asarray(total_sqft, dtype=np.float32),
+            np.asarray(bath, dtype=np.int8),
+            np.asarray(bhk, dtype=np.int8),
+            np.asarray(price, dtype=np.float64),
+            locations,
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.location_code, self.total_sqft, self.bath, self.bhk, self.price))
+
+    def take(self, index) -> "FeatureStore":
+        return FeatureStore(self.location_code[index], self.total_sqft[index], self.bath[index],
+                            self.bhk[index], self.price[index], self.locations)
+
+    @property
+    def one_hot_locations(self) -> list:
+        """Locations that get a one-hot column ('other' is the all-zero baseline)."""
+        return [name for name in self.locations if name != 'other']
+
+    @property
+    def columns(self) -> list:
+        return list(NUMERIC_FEATURES) + self.one_hot_locations
+
+    def _location_columns(self) -> np.ndarray:
+        """One-hot column position for every row, -1 for 'other' (no column)."""
+        column_of_code = np.full(len(self.locations), -1, dtype=np.int64)
+        for pos, name in enumerate(self.one_hot_locations):
+            column_of_code[self.locations.index(name)] = 3 + pos
+        return column_of_code[self.location_code]
+
+    def to_csr(self) -> sp.csr_matrix:
+        """Sparse float32 design matrix in `columns` order: 3 numeric entries plus at most one
+        one-hot entry per row, built directly from the location codes.
+        """
+        n = len(self)
+        cols = self._location_columns()
+        has_loc = cols >= 0
+        row_nnz = 3 + has_loc.astype(np.int64)
+        indptr = np.concatenate([[0], np.cumsum(row_nnz)])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        data = np.empty(indptr[-1], dtype=np.float32)
+        starts = indptr[:-1]
+        for j, values in enumerate((self.total_sqft, self.bath, self.bhk)):
+            indices[starts + j] = j
+            data[starts + j] = values
+        indices[starts[has_loc] + 3] = cols[has_loc]
+        data[starts[has_loc] + 3] = 1
+        # Numeric zeros (e.g. bath == 0) are stored explicitly; sklearn handles that fine
+        return sp.csr_matrix((data, indices, indptr), shape=(n, 3 + len(self.one_hot_locations)))
+
+    def to_matrix(self) -> np.ndarray:
+        """Dense float32 design matrix in `columns` order (the dtype the forest trains on)."""
+        X = np.zeros((len(self), 3 + len(self.one_hot_locations)), dtype=np.float32)
+        X[:, 0] = self.total_sqft
+        X[:, 1] = self.bath
+        X[:, 2] = self.bhk
+        cols = self._location_columns()
+        rows = np.nonzero(cols >= 0)[0]
+        X[rows, cols[rows]] = 1
+        return X
+
+    def save(self, path: str):
+        np.savez(path, location_code=self.location_code, total_sqft=self.total_sqft, bath=self.bath,
+                 bhk=self.bhk, price=self.price, locations=np.array(self.locations, dtype=str))
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureStore":
+        with np.load(path) as data:
+            return cls(data['location_code'], data['total_sqft'], data['bath'], data['bhk'],
+                       data['price'], data['locations'].tolist())
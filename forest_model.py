@@ -0,0 +1,187 @@
+"""Flat-array export of the trained RandomForestRegressor and a loader that memory-maps it.
+
+The artifact is a directory of .npy files (one packed array per node attribute, all trees
+concatenated) plus meta.json. Loading with mmap_mode="r" lets every gunicorn worker share
+the same page-cache pages and does not depend on the installed scikit-learn version.
+"""
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "missing_left", "value", "roots")
+# Interleaved (left, right) child pointers used by the traversal; rebuilt in memory when an
+# older export lacks the file
+CHILDREN_NAME = "children"
+# Rows per traversal chunk; bounds the (rows x trees) index matrices to a few MB
+PREDICT_CHUNK_ROWS = 4096
+
+
+def export_forest(model, path: str) -> dict:
+    """Write a fitted single-output RandomForestRegressor to `path` as packed node arrays.
+
+    Child pointers are global node indices. Leaves point to themselves on both sides, so a
+    traversal can run a fixed number of steps without checking for leaves.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    counts = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+
+    feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+    for tree, offset in zip(trees, roots):
+        if tree.n_outputs != 1:
+            raise ValueError("❌ Only single-output regression forests can be exported.")
+        node_ids = np.arange(tree.node_count, dtype=np.int64) + offset
+        is_leaf = tree.children_left == -1
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+        right.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+        mgl = getattr(tree, "missing_go_to_left", None)
+        missing_left.append(np.zeros(tree.node_count, dtype=np.uint8) if mgl is None else np.asarray(mgl, dtype=np.uint8))
+        value.append(tree.value[:, 0, 0])
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "missing_left": np.concatenate(missing_left).astype(np.uint8),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": roots,
+    }
+    arrays[CHILDREN_NAME] = interleave_children(arrays["left"], arrays["right"])
+
+    os.makedirs(path, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr))
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "n_trees": len(trees),
+        "n_features": int(model.n_features_in_),
+        "n_nodes": int(counts.sum()),
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "tree_depths": [int(t.max_depth) for t in trees],
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def interleave_children(left, right) -> np.ndarray:
+    """(left, right) pairs flattened, so one gather picks the next node: children[2 * node + go_right]."""
+    return np.stack([left, right], axis=1).astype(np.int64).ravel()
+
+
+class ForestModel:
+    """Read-only forest backed by (optionally memory-mapped) packed node arrays.
+
+    Exposes the `predict` subset of the sklearn estimator API used by the app.
+    """
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.meta = meta
+        self.n_features_in_ = meta["n_features"]
+        self.n_estimators = meta["n_trees"]
+        self.max_depth = meta["max_depth"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"]
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"], dtype=np.int64)
+        # Memory-mapped like the other arrays when exported, so workers share its pages too
+        children = arrays.get(CHILDREN_NAME)
+        self.children = interleave_children(self.left, self.right) if children is None else children
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "ForestModel":
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"❌ Unsupported forest artifact version: {meta.get('format_version')}")
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in ARRAY_NAMES}
+        children_file = os.path.join(path, f"{CHILDREN_NAME}.npy")
+        if os.path.exists(children_file):
+            arrays[CHILDREN_NAME] = np.load(children_file, mmap_mode=mode)
+        return cls(arrays, meta)
+
+    def fingerprint(self) -> str:
+        """Content hash of the tree structure and leaf values (identifies derived artifacts)."""
+        digest = hashlib.sha1()
+        for arr in (self.feature, self.threshold, self.children, self.value):
+            digest.update(np.ascontiguousarray(arr).tobytes())
+        return digest.hexdigest()
+
+    def _validate(self, X) -> np.ndarray:
+        # Trees were fitted on float32 inputs; compare in the same precision as sklearn does
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"❌ Expected a 2D array with {self.n_features_in_} features, got shape {X.shape}.")
+        if np.isinf(X).any():
+            raise ValueError("❌ Input contains infinity.")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        return self._apply(self._validate(X))
+
+    def _apply(self, X: np.ndarray) -> np.ndarray:
+        # All trees are walked together: each step gathers one node per (row, tree) from the
+        # packed arrays. Leaves loop back to themselves, so max_depth steps reach every leaf.
+        X = np.ascontiguousarray(X)
+        flat = X.ravel()
+        row_offset = (np.arange(X.shape[0], dtype=np.int64) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators))
+        for _ in range(self.max_depth):
+            x = flat[row_offset + self.feature[node]]
+            go_right = ~(x <= self.threshold[node])
+            nan = np.isnan(x)
+            if nan.any():
+                go_right = np.where(nan, self.missing_left[node] == 0, go_right)
+            node = self.children[2 * node + go_right]
+        return node
+
+    def predict(self, X) -> np.ndarray:
+        """Mean of the per-tree leaf values for a dense array or a scipy sparse matrix.
+        Bit-for-bit equal to RandomForestRegressor.predict when sklearn accumulates trees in order (n_jobs=1).
+        """
+        sparse = sp.issparse(X)
+        if sparse:
+            # Rows are densified one chunk at a time, so a large CSR batch never becomes fully dense
+            X = X.tocsr()
+            if X.shape[1] != self.n_features_in_:
+                raise ValueError(f"❌ Expected {self.n_features_in_} features, got shape {X.shape}.")
+        else:
+            X = self._validate(X)
+        out = np.zeros(X.shape[0])
+        for start in range(0, X.shape[0], PREDICT_CHUNK_ROWS):
+            block = X[start:start + PREDICT_CHUNK_ROWS]
+            if sparse:
+                block = self._validate(block.toarray())
+            leaf_values = self.value[self._apply(block)]
+            chunk = out[start:start + PREDICT_CHUNK_ROWS]
+            # Accumulate tree by tree (not .sum(axis=1), which reorders the float additions)
+            for t in range(self.n_estimators):
+                chunk += leaf_values[:, t]
+        out /= self.n_estimators
+        return out
+
+if __name__ == "__main__":
+    # Usage: python forest_model.py <model.pickle> <output_dir>
+    import pickle
+
+    if len(sys.argv) != 3:
+        print("Usage: python forest_model.py <model.pickle> <output_dir>")
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as f:
+        sk_model = pickle.load(f)
+    info = export_forest(sk_model, sys.argv[2])
+    print(f"✅ Exported {info['n_trees']} trees ({info['n_nodes']} nodes) to {sys.argv[2]}")
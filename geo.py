@@ -0,0 +1,61 @@
+"""Vectorized distance, de-duplication and nearest-k helpers for place ranking."""
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+# Places closer than this many decimal degrees (~1 m at 5) with the same name are one place
+DEDUP_DECIMALS = 5
+
+
+def haversine_meters(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters; any argument may be an array (NumPy broadcasting)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def dedup_indices(lat, lon, names=None, decimals: int = DEDUP_DECIMALS) -> np.ndarray:
+    """Positions of the first occurrence of every (rounded lat, rounded lon[, name]) key, in input order."""
+    scale = 10.0 ** decimals
+    columns = [np.round(np.asarray(lat, dtype=np.float64) * scale).astype(np.int64),
+               np.round(np.asarray(lon, dtype=np.float64) * scale).astype(np.int64)]
+    if names is not None:
+        columns.append(np.unique(np.asarray(names, dtype=object).astype(str), return_inverse=True)[1].ravel())
+    if not len(columns[0]):
+        return np.empty(0, dtype=np.int64)
+    _, first = np.unique(np.stack(columns, axis=1), axis=0, return_index=True)
+    return np.sort(first)
+
+
+def nearest_k(distances, k: int) -> np.ndarray:
+    """Indices of the k smallest distances, nearest first (ties keep input order)."""
+    distances = np.asarray(distances, dtype=np.float64)
+    if k <= 0:
+        idx = np.empty(0, dtype=np.int64)
+    elif k < len(distances):
+        idx = np.argpartition(distances, k - 1)[:k]
+        kth = distances[idx].max()
+        if not np.isnan(kth):
+            # argpartition picks arbitrarily among distances tied with the k-th one; take
+            # everything nearer plus the earliest of the tied indices instead
+            nearer = np.flatnonzero(distances < kth)
+            idx = np.concatenate((nearer, np.flatnonzero(distances == kth)[:k - len(nearer)]))
+    else:
+        idx = np.arange(len(distances))
+    return idx[np.lexsort((idx, distances[idx]))]
+
+
+def rank_places(places: list, lat: float, lon: float, k: int = 50) -> list:
+    """De-duplicate place dicts (lat/lon/name) and keep the k nearest to (lat, lon), nearest
+    first, each with its `distance_m` filled in."""
+    if not places:
+        return []
+    plat = np.fromiter((p['lat'] for p in places), dtype=np.float64, count=len(places))
+    plon = np.fromiter((p['lon'] for p in places), dtype=np.float64, count=len(places))
+    keep = dedup_indices(plat, plon, [p.get('name') for p in places])
+    dist = haversine_meters(lat, lon, plat[keep], plon[keep])
+    ranked = []
+    for i in nearest_k(dist, k):
+        place = places[keep[i]]
+        place['distance_m'] = round(float(dist[i]), 2)
+        ranked.append(place)
+    return ranked
@@ -0,0 +1,302 @@
+"""Geocode repository over the heatmap_data table in house_prices.db.
+
+Keeps one SQLite connection per process behind a lock (WAL mode, so other processes' readers
+never block the writer; the schema is set up once at construction), looks names up through a
+uniquely indexed normalized_location column, and serves repeat lookups from an
+in-process dict that is filled from the whole table at startup.
+
+Misses go through `resolve`: concurrent misses for the same normalized name share one upstream
+fetch and one upsert (single-flight), and names the geocoder cannot resolve are remembered for
+a while (negative cache). Both in-memory maps are bounded, since the names come from clients.
+
+Usage (geocode every model location ahead of traffic, at Nominatim's 1 request/second):
+    python geocode_store.py prefetch [--columns columns.json] [--db house_prices.db] [--interval 1.0]
+"""
+import argparse
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from feature_schema import normalize_location
+from metrics import observe_upstream, request_log, time_stage
+
+NOMINATIM_API_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "Bangalore Property App/1.0"
+
+
+# The same key the model's feature schema uses, so both agree on which names are one place
+normalize_name = normalize_location
+
+
+def osm_geocode(name, url: str = NOMINATIM_API_URL, timeout: float = 5):
+    """(lat, lon) of the first Nominatim match, or None when there is none. Network and HTTP
+    errors raise, so callers can tell "unknown place" from "upstream down"."""
+    started = time.perf_counter()
+    try:
+        response = requests.get(url, params={"q": name, "format": "json"}, timeout=timeout,
+                                headers={"User-Agent": USER_AGENT})
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        observe_upstream("nominatim", url, time.perf_counter() - started, "error")
+        raise
+    observe_upstream("nominatim", url, time.perf_counter() - started, "ok" if data else "empty")
+    if data:
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    return None
+
+
+class _Flight:
+    """One in-progress upstream lookup that later callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class GeocodeRepository:
+    """Location name -> (lat, lon) store backed by SQLite with an in-memory read cache."""
+
+    def __init__(self, db_path: str = "house_prices.db", negative_ttl: float = 6 * 3600,
+                 max_cached: int = 50000, max_negative: int = 10000):
+        self.db_path = db_path
+        self.negative_ttl = negative_ttl
+        # Past max_cached names, lookups still work but go to SQLite instead of growing the dict
+        self.max_cached = max_cached
+        self.max_negative = max_negative
+        # One connection shared by every thread/greenlet of the process: a threading.local would
+        # be per-greenlet under gevent, i.e. a new connection (and PRAGMAs) per request
+        self._conn = None
+        self._conn_pid = None
+        self._db_lock = threading.Lock()
+        self._cache = {}
+        # normalized name -> monotonic time until which it is known to be unresolvable, in
+        # insertion (= expiry) order so the oldest entries are swept or evicted first
+        self._negative = OrderedDict()
+        self._flights = {}
+        self._flight_lock = threading.Lock()
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.hits = 0
+        self.misses = 0
+        with self._db() as conn:
+            self._ensure_schema(conn)
+
+    @contextmanager
+    def _db(self):
+        """The process's connection, held exclusively for the duration of the block."""
+        with self._db_lock:
+            if self._conn is None or self._conn_pid != os.getpid():
+                # A handle inherited across fork() is dropped, never used or closed in the child
+                conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn, self._conn_pid = conn, os.getpid()
+            yield self._conn
+
+    def close(self):
+        """Close the connection; the next call opens a new one."""
+        with self._db_lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Create the table if needed and migrate older databases to the indexed normalized column."""
+        conn.execute("""CREATE TABLE IF NOT EXISTS heatmap_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            location TEXT UNIQUE,
+            latitude REAL,
+            longitude REAL,
+            avg_price REAL DEFAULT 0,
+            normalized_location TEXT
+        )""")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(heatmap_data)")}
+        if "normalized_location" not in columns:
+            conn.execute("ALTER TABLE heatmap_data ADD COLUMN normalized_location TEXT")
+        # Rows never normalized, or normalized by an older rule (lower() rather than casefold())
+        stale = [(normalize_name(location), row_id) for row_id, location, key
+                 in conn.execute("SELECT id, location, normalized_location FROM heatmap_data")
+                 if key != normalize_name(location)]
+        unique = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_heatmap_normalized_location'").fetchone()
+        if stale or not unique:
+            conn.execute("DROP INDEX IF EXISTS uq_heatmap_normalized_location")
+            conn.execute("DROP INDEX IF EXISTS idx_heatmap_normalized_location")
+            conn.executemany("UPDATE heatmap_data SET normalized_location = ? WHERE id = ?", stale)
+            # Several spellings of one name collapse to the oldest row, which is the one lookups
+            # already returned, then the normalized name becomes the row's key
+            conn.execute("""DELETE FROM heatmap_data WHERE id NOT IN (
+                                SELECT MIN(id) FROM heatmap_data GROUP BY normalized_location)""")
+            conn.execute("CREATE UNIQUE INDEX uq_heatmap_normalized_location ON heatmap_data (normalized_location)")
+        conn.commit()
+
+    def load_all(self) -> int:
+        """Fill the in-memory cache from the whole table; returns the number of names cached."""
+        with self._db() as conn:
+            rows = conn.execute("SELECT normalized_location, latitude, longitude FROM heatmap_data").fetchall()
+        for name, lat, lon in rows:
+            if name:
+                self._remember(name, (lat, lon))
+        return len(self._cache)
+
+    def _remember(self, key: str, coords):
+        if key in self._cache or len(self._cache) < self.max_cached:
+            self._cache[key] = coords
+
+    def _mark_negative(self, key: str):
+        now = time.monotonic()
+        self._negative.pop(key, None)
+        self._negative[key] = now + self.negative_ttl
+        # Sweep expired entries from the front, then evict the oldest beyond the cap
+        while self._negative:
+            oldest, until = next(iter(self._negative.items()))
+            if until > now and len(self._negative) <= self.max_negative:
+                break
+            del self._negative[oldest]
+
+    def get(self, name):
+        """(lat, lon) for a location name, or None. Only cache misses touch SQLite."""
+        key = normalize_name(name)
+        coords = self._cache.get(key)
+        if coords is not None:
+            self.hits += 1
+            return coords
+        self.misses += 1
+        with time_stage("sqlite_geocode"), self._db() as conn:
+            row = conn.execute(
+                "SELECT latitude, longitude FROM heatmap_data WHERE normalized_location = ?", (key,)).fetchone()
+        if row:
+            self._remember(key, row)
+        return row
+
+    def save(self, name, lat: float, lon: float):
+        """Upsert a location row keyed by its normalized name and cache it. A second writer for the
+        same name (in any spelling) updates the coordinates and keeps the first display name."""
+        key = normalize_name(name)
+        with self._db() as conn:
+            conn.execute("""INSERT INTO heatmap_data (location, latitude, longitude, normalized_location) VALUES (?, ?, ?, ?)
+                            ON CONFLICT(normalized_location) DO UPDATE SET latitude = excluded.latitude,
+                                longitude = excluded.longitude""",
+                         (str(name).strip(), lat, lon, key))
+            conn.commit()
+        self._remember(key, (lat, lon))
+        self._negative.pop(key, None)
+
+    def is_negative(self, name) -> bool:
+        key = normalize_name(name)
+        until = self._negative.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            self._negative.pop(key, None)
+            return False
+        return True
+
+    def resolve(self, name, fetcher):
+        """(lat, lon) for `name`: cache/SQLite first, then `fetcher(name)` on a miss.
+
+        Only one fetch per normalized name runs at a time; concurrent callers wait for it and
+        share its result. A fetcher returning None marks the name unresolvable for
+        `negative_ttl` seconds; a fetcher that raises is not remembered (the next call retries).
+        """
+        coords = self.get(name)
+        if coords is not None:
+            return coords
+        if self.is_negative(name):
+            return None
+
+        key = normalize_name(name)
+        with self._flight_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            self.upstream_calls += 1
+            try:
+                coords = fetcher(name)
+            except Exception as e:
+                print(f"🌍 OSM Fetch Error: {e}")
+                coords = None
+            else:
+                if coords is None:
+                    self._mark_negative(key)
+                else:
+                    try:
+                        self.save(name, coords[0], coords[1])
+                        request_log(f"✅ Saved {name} to database!")
+                    except Exception as e:
+                        print(f"❌ Failed to save location to DB: {e}")
+                        self._remember(key, tuple(coords))
+            flight.result = coords
+            return coords
+        finally:
+            with self._flight_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def prefetch(self, names, fetcher, interval: float = 1.0) -> dict:
+        """Resolve every name not cached yet, spacing upstream calls at least `interval` seconds
+        apart. Returns counts of cached / resolved / unresolved names."""
+        counts = {"cached": 0, "resolved": 0, "unresolved": 0}
+        last_call = None
+        for name in names:
+            if self.get(name) is not None:
+                counts["cached"] += 1
+                continue
+            if last_call is not None:
+                time.sleep(max(0.0, interval - (time.monotonic() - last_call)))
+            last_call = time.monotonic()
+            counts["resolved" if self.resolve(name, fetcher) is not None else "unresolved"] += 1
+        return counts
+
+    def cached_count(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "negative": len(self._negative),
+            "in_flight": len(self._flights),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode every model location into heatmap_data")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prefetch = sub.add_parser("prefetch", help="geocode the locations listed in columns.json")
+    prefetch.add_argument("--columns", default="columns.json")
+    prefetch.add_argument("--db", default="house_prices.db")
+    prefetch.add_argument("--url", default=NOMINATIM_API_URL)
+    prefetch.add_argument("--interval", type=float, default=1.0, help="minimum seconds between upstream requests")
+    prefetch.add_argument("--suffix", default=", Bengaluru", help="appended to each name in the upstream query")
+    args = parser.parse_args()
+
+    with open(args.columns) as f:
+        # The first three columns are total_sqft, bath and bhk; the rest are location one-hots
+        names = json.load(f)["data_columns"][3:]
+    repo = GeocodeRepository(args.db)
+    repo.load_all()
+    started = time.perf_counter()
+    counts = repo.prefetch(names, lambda name: osm_geocode(f"{name}{args.suffix}", url=args.url), interval=args.interval)
+    print(f"✅ Prefetched {len(names)} locations in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
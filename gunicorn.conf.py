@@ -0,0 +1,78 @@
+"""Production gunicorn settings (the Procfile runs `gunicorn --config gunicorn.conf.py app:app`).
+
+With preload on, the master imports app.py once (model bundle, schema, price grid, geocode
+cache, amenity index) and forks the workers from it, so they share those pages copy-on-write
+instead of each holding a private copy. Garbage collection stays off in the master and the heap
+is frozen right before every fork: collections in the workers then never touch (and so never
+un-share) the preloaded objects. Database handles opened during the import are closed before
+forking, and every worker opens its own.
+
+Everything can be overridden from the environment or the command line (which wins, as usual
+for gunicorn); benchmarks/worker_memory.py compares preload on and off.
+"""
+import gc
+import os
+import sys
+import time
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() not in ("0", "false", "no", "off")
+
+
+def _override(name: str):
+    """A setting passed on the command line or in GUNICORN_CMD_ARGS, or None. gunicorn applies
+    those after reading this file, so decisions taken here must look at them too."""
+    from gunicorn.config import Config
+
+    cfg = Config()
+    parser = cfg.parser()
+    for argv in (sys.argv[1:], cfg.get_cmd_args_from_env()):
+        value = getattr(parser.parse_known_args(argv)[0], name, None)
+        if value is not None:
+            return value
+    return None
+
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+# WEB_CONCURRENCY is set by the platform from the dyno size
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+# Recycle workers to cap slow leaks; the jitter keeps them from restarting together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+preload_app = _flag("GUNICORN_PRELOAD", "1")
+
+if preload_app or _override("preload_app"):
+    if (_override("worker_class") or worker_class) in ("gevent", "gunicorn.workers.ggevent.GeventWorker"):
+        # Patch before app.py imports requests/ssl/threading in the master, not after the fork
+        from gevent import monkey
+        monkey.patch_all()
+    # No collections in the master while the app is imported; frozen in pre_fork instead
+    gc.disable()
+
+
+def pre_fork(server, worker):
+    worker.fork_started = time.monotonic()
+    if not server.cfg.preload_app:
+        return
+    # The preloaded application (whatever module the command line named); only app.py's has the hook
+    application = server.app.wsgi()
+    prepare_fork = getattr(sys.modules.get(getattr(application, "import_name", "")), "prepare_fork", None)
+    if prepare_fork is not None:
+        prepare_fork()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        gc.enable()
+
+
+def post_worker_init(worker):
+    started = getattr(worker, "fork_started", None)
+    if started is not None:
+        worker.log.info("Worker %s ready in %.3fs", worker.pid, time.monotonic() - started)
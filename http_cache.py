@@ -0,0 +1,113 @@
+"""Precomputed HTTP response bodies with ETags, pre-compressed variants and conditional GETs.
+
+A StaticPayload holds the identity bytes of a response plus gzip (and, when the optional
+`brotli` package is installed, br) variants compressed once at build time. Serving it is a
+header parse and a dict lookup: If-None-Match answers 304 with no body, otherwise the smallest
+encoding the client accepts is returned with its Content-Length, ETag and Cache-Control.
+"""
+import gzip
+import hashlib
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing (headers and framing dominate)
+MIN_COMPRESS_BYTES = 256
+# Preference when the client accepts several encodings equally
+ENCODING_ORDER = ("br", "gzip", "identity")
+
+
+def _compressors() -> dict:
+    compressors = {"gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=11)
+    return compressors
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """{coding: q} from an Accept-Encoding header ('*' kept as a key)."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _etag_values(header: str) -> set:
+    """Opaque tags listed in If-None-Match, weak prefixes dropped (GET uses weak comparison)."""
+    tags = set()
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class StaticPayload:
+    """One response body in every encoding, ready to serve."""
+
+    def __init__(self, body: bytes, content_type: str, cache_control: str = "no-cache"):
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha1(body).hexdigest()[:16]
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            for coding, compress in _compressors().items():
+                compressed = compress(body)
+                if len(compressed) < len(body):
+                    self.variants[coding] = compressed
+        # Each encoding is a different representation, so it gets its own strong ETag
+        self.etags = {coding: f'"{self.digest}"' if coding == "identity" else f'"{self.digest}-{coding}"'
+                      for coding in self.variants}
+
+    def sizes(self) -> dict:
+        return {coding: len(body) for coding, body in self.variants.items()}
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*")
+        best, best_q = None, 0.0
+        for coding in ENCODING_ORDER:
+            if coding not in self.variants:
+                continue
+            q = accepted.get(coding, wildcard if wildcard is not None else (1.0 if coding == "identity" else 0.0))
+            if q > best_q:
+                best, best_q = coding, q
+        return best or "identity"
+
+    def not_modified(self, if_none_match: str) -> bool:
+        tags = _etag_values(if_none_match)
+        return "*" in tags or not tags.isdisjoint(self.etags.values())
+
+    def response(self, request, cache_control: str = None) -> Response:
+        """200 with the best variant, or 304 when the client's ETag still matches."""
+        coding = self.choose_encoding(request.headers.get("Accept-Encoding", ""))
+        headers = {
+            "ETag": self.etags[coding],
+            "Cache-Control": cache_control or self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request.headers.get("If-None-Match", "")):
+            return Response(status=304, headers=headers)
+
+        body = self.variants[coding]
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(body, status=200, headers=headers, content_type=self.content_type)
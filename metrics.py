@@ -0,0 +1,147 @@
+"""In-process latency histograms, counters and gauges rendered in Prometheus text format.
+
+Everything is recorded into the module-level `registry`, so helper modules (Overpass client,
+geocode store) can time their own calls without being handed an object. `request_log` is the
+switchable replacement for the per-request `print` calls.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds: sub-millisecond model calls up to upstream timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-request informational prints; the app turns this off with REQUEST_LOGGING=0
+REQUEST_LOGGING = True
+
+
+def request_log(*args):
+    """print() for per-request chatter, silenced when REQUEST_LOGGING is off."""
+    if REQUEST_LOGGING:
+        print(*args)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(labels: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Thread-safe store of histograms and counters plus gauge callbacks."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        # name -> {labels tuple: [bucket counts..., sum, count]}
+        self._histograms = {}
+        # name -> {labels tuple: value}
+        self._counters = {}
+        # name -> callable returning {labels tuple: value}
+        self._gauges = {}
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._types:
+            self._types[name] = kind
+            self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                state[i] += 1
+            state[-2] += seconds
+            state[-1] += 1
+
+    def inc(self, name: str, amount: float = 1, help_text: str = "", **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def gauge(self, name: str, fn, help_text: str = "", kind: str = "gauge"):
+        """Register `fn() -> {labels tuple: value}` evaluated at scrape time. Use kind="counter"
+        for running totals that another object already keeps (e.g. cache hit counts)."""
+        with self._lock:
+            self._declare(name, kind, help_text)
+            self._gauges[name] = fn
+
+    @contextmanager
+    def timer(self, name: str, help_text: str = "", **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, help_text, **labels)
+
+    def render(self) -> str:
+        """All series in Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = dict(self._gauges)
+            types = dict(self._types)
+            helps = dict(self._help)
+
+        lines = []
+        for name in sorted(types):
+            lines.append(f"# HELP {name} {helps[name] or name}")
+            lines.append(f"# TYPE {name} {types[name]}")
+            if types[name] == "histogram":
+                for key, state in sorted(histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, state):
+                        cumulative += count
+                        le = 'le="%s"' % _format_value(bound)
+                        lines.append(f"{name}_bucket{_label_str(key, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_label_str(key, le)} {state[-1]}")
+                    lines.append(f"{name}_sum{_label_str(key)} {_format_value(state[-2])}")
+                    lines.append(f"{name}_count{_label_str(key)} {state[-1]}")
+            elif name in counters:
+                for key, value in sorted(counters[name].items()):
+                    lines.append(f"{name}{_label_str(key)} {_format_value(value)}")
+            else:
+                try:
+                    values = gauges[name]()
+                except Exception as e:
+                    print(f"⚠️ Metrics gauge {name} failed: {e}")
+                    continue
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_label_str(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def time_stage(stage: str):
+    """Context manager timing one step of request handling (feature assembly, model, SQLite...)."""
+    return registry.timer("app_stage_duration_seconds", "Time spent in internal request stages", stage=stage)
+
+
+def observe_upstream(service: str, endpoint: str, seconds: float, outcome: str):
+    """Record one call to an external API (Overpass mirror, Nominatim)."""
+    registry.observe("app_upstream_request_duration_seconds", seconds, "Latency of external API calls",
+                     service=service, endpoint=endpoint, outcome=outcome)
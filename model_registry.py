@@ -0,0 +1,348 @@
+"""Versioned model artifacts with hot reloading.
+
+A release is a directory models/<version>/ holding the artifacts train_optimized_model.py writes
+(pickle, flat-array forest, price grid, columns.json); models/CURRENT names the live one. Workers
+stat CURRENT at most once per poll interval, load a new version on a background thread and swap
+it in with a single reference assignment. Requests take the active ModelBundle once and use only
+that, so a model, its columns and its price grid are always seen together.
+
+Without models/CURRENT the artifacts in the working directory are served as version
+"unversioned-<content hash>", so retraining in place still yields a new version name.
+
+Usage: python model_registry.py publish [--from DIR] [--version NAME] [--no-activate]
+       python model_registry.py activate <version>
+       python model_registry.py list
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+
+from feature_schema import FeatureSchema
+from forest_model import ForestModel
+from price_grid import PriceGrid
+
+MODEL_FILE = "banglore_home_prices_model.pickle"
+FOREST_DIR = "banglore_home_prices_model.forest"
+GRID_DIR = "banglore_home_prices_model.grid"
+COLUMNS_FILE = "columns.json"
+ARTIFACTS = (MODEL_FILE, FOREST_DIR, GRID_DIR, COLUMNS_FILE)
+
+DEFAULT_ROOT = "models"
+POINTER_FILE = "CURRENT"
+UNVERSIONED = "unversioned"
+
+
+class ModelBundle:
+    """One loaded model version: the predictor plus the schema and price grid built for it."""
+
+    def __init__(self, version: str, directory: str, model, feature_schema: FeatureSchema, price_grid=None,
+                 load_seconds: float = 0.0):
+        self.version = version
+        self.directory = directory
+        self.model = model
+        self.feature_schema = feature_schema
+        self.price_grid = price_grid
+        self.locations = tuple(feature_schema.locations)
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "model_type": type(self.model).__name__,
+            "n_features": self.feature_schema.n_features,
+            "n_locations": len(self.locations),
+            "price_grid": self.price_grid is not None,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.loaded_at)),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+def _model_digest(model, model_file: str) -> str:
+    """Short content hash of a loaded model: the forest fingerprint, else the pickle's bytes."""
+    if isinstance(model, ForestModel):
+        return model.fingerprint()[:12]
+    digest = hashlib.sha1()
+    with open(model_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def load_bundle(directory: str, version: str, engine: str = "native") -> ModelBundle:
+    """Load and cross-check every artifact of one version.
+    The native engine memory-maps the flat-array forest; without that artifact (or with
+    engine="sklearn") the sklearn pickle is used.
+    """
+    started = time.perf_counter()
+    columns_file = os.path.join(directory, COLUMNS_FILE)
+    forest_dir = os.path.join(directory, FOREST_DIR)
+    model_file = os.path.join(directory, MODEL_FILE)
+    if not os.path.exists(columns_file):
+        raise FileNotFoundError(f"❌ Columns file '{columns_file}' not found.")
+
+    model = None
+    if engine == "native" and os.path.exists(os.path.join(forest_dir, "meta.json")):
+        try:
+            model = ForestModel.load(forest_dir)
+        except Exception as e:
+            print(f"⚠️ Could not load forest artifact '{forest_dir}', falling back to pickle: {e}")
+    if model is None:
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"❌ Model file '{model_file}' not found.")
+        with open(model_file, "rb") as f:
+            model = pickle.load(f)
+
+    if version == UNVERSIONED:
+        version = f"{UNVERSIONED}-{_model_digest(model, model_file)}"
+
+    feature_schema = FeatureSchema.from_file(columns_file)
+    n_model_features = getattr(model, "n_features_in_", feature_schema.n_features)
+    if n_model_features != feature_schema.n_features:
+        raise ValueError(f"❌ Model expects {n_model_features} features but columns file has {feature_schema.n_features}.")
+
+    # Precomputed price table (only valid for the exact forest it was built from)
+    price_grid = None
+    grid_dir = os.path.join(directory, GRID_DIR)
+    if isinstance(model, ForestModel) and os.path.exists(os.path.join(grid_dir, "meta.json")):
+        try:
+            price_grid = PriceGrid.load(grid_dir, feature_schema, model)
+        except Exception as e:
+            print(f"⚠️ Ignoring price grid '{grid_dir}': {e}")
+
+    return ModelBundle(version, directory, model, feature_schema, price_grid, time.perf_counter() - started)
+
+
+class ModelRegistry:
+    """Serves the bundle models/CURRENT points to and swaps in new versions without a restart."""
+
+    def __init__(self, root: str = DEFAULT_ROOT, fallback_dir: str = ".", engine: str = "native",
+                 poll_interval: float = 5.0, on_swap=None):
+        self.root = root
+        self.fallback_dir = fallback_dir
+        self.engine = engine
+        self.poll_interval = poll_interval
+        # Called with the new bundle right after it becomes active (e.g. to drop cached prices)
+        self.on_swap = on_swap
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._loading = None
+        self._pointer_stat = None
+        self._next_poll = 0.0
+        self.swaps = 0
+        self.failures = 0
+        # Name of the last version that failed to load; the error itself only goes to the log
+        self.last_failed_version = None
+
+    @property
+    def pointer_path(self) -> str:
+        return os.path.join(self.root, POINTER_FILE)
+
+    def active(self):
+        """The bundle to use for a whole request (None if no version could be loaded)."""
+        return self._bundle
+
+    def read_pointer(self):
+        """Version named by CURRENT, or None when the registry is not in use."""
+        try:
+            with open(self.pointer_path, "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _pointer_signature(self):
+        try:
+            st = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        # CURRENT is replaced, never edited, so a new inode means a new pointer
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _resolve(self, version):
+        if version is None:
+            return UNVERSIONED, self.fallback_dir
+        return version, os.path.join(self.root, version)
+
+    def columns_path(self) -> str:
+        """columns.json of the version CURRENT points to."""
+        return os.path.join(self._resolve(self.read_pointer())[1], COLUMNS_FILE)
+
+    def load_current(self):
+        """Load the pointed-to version in the calling thread (startup). Returns the bundle or None."""
+        self._pointer_stat = self._pointer_signature()
+        return self._load_and_swap(self.read_pointer())
+
+    def poll(self):
+        """Cheap per-request check: at most one stat() per poll interval, and a background load
+        when CURRENT changed. The request that notices keeps using the old bundle."""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        signature = self._pointer_signature()
+        if signature == self._pointer_stat:
+            return
+        self._pointer_stat = signature
+        self.reload_async(self.read_pointer())
+
+    def refresh(self):
+        """Load the pointed-to version in the calling thread if CURRENT changed since the last
+        check (the gunicorn master runs this before forking a replacement worker)."""
+        signature = self._pointer_signature()
+        if signature != self._pointer_stat:
+            self._pointer_stat = signature
+            version = self.read_pointer()
+            if self._bundle is None or self._bundle.version != self._resolve(version)[0]:
+                self._load_and_swap(version)
+        return self._bundle
+
+    def reload_async(self, version) -> bool:
+        """Start loading `version` on a background thread unless it is already active or loading."""
+        name, _ = self._resolve(version)
+        active = self._bundle
+        if active is not None and active.version == name:
+            return False
+        with self._lock:
+            if self._loading is not None:
+                # Another load is running; re-read CURRENT at the next poll once it is done
+                self._pointer_stat = None
+                return False
+            self._loading = name
+        threading.Thread(target=self._load_and_swap, args=(version,), name="model-reload", daemon=True).start()
+        return True
+
+    def _load_and_swap(self, version):
+        name, directory = self._resolve(version)
+        try:
+            bundle = load_bundle(directory, name, self.engine)
+        except Exception as e:
+            self.failures += 1
+            self.last_failed_version = name
+            print(f"❌ Error loading model version '{name}': {e}")
+            with self._lock:
+                self._loading = None
+            return None
+
+        # A single reference assignment: requests see either the old bundle or the new one
+        self._bundle = bundle
+        # Only now, so a poll in between sees the version as loading or active, never neither
+        with self._lock:
+            self._loading = None
+        self.swaps += 1
+        self.last_failed_version = None
+        if self.on_swap is not None:
+            self.on_swap(bundle)
+        print(f"✅ Model version {bundle.version} ({type(bundle.model).__name__}, {len(bundle.locations)} locations) "
+              f"loaded in {bundle.load_seconds * 1000:.0f} ms")
+        return bundle
+
+    def status(self) -> dict:
+        bundle = self._bundle
+        return {
+            "active": bundle.describe() if bundle is not None else None,
+            "pointer": self._resolve(self.read_pointer())[0],
+            "loading": self._loading,
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "last_failed_version": self.last_failed_version,
+            "poll_interval_seconds": self.poll_interval,
+        }
+
+
+# --- Publishing (training side) ---
+
+def _content_id(directory: str) -> str:
+    """Short hash of the artifacts in `directory`, so identical models get recognisable names."""
+    digest = hashlib.sha1()
+    for name in ARTIFACTS:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, f) for f in os.listdir(path))
+        else:
+            files = [path] if os.path.isfile(path) else []
+        for file in files:
+            digest.update(os.path.relpath(file, directory).encode())
+            with open(file, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()[:8]
+
+
+def list_versions(root: str = DEFAULT_ROOT) -> list:
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith(".") and os.path.isdir(os.path.join(root, name)))
+
+
+def activate(version: str, root: str = DEFAULT_ROOT):
+    """Point CURRENT at an existing version (also how a release is rolled back)."""
+    if not os.path.exists(os.path.join(root, version, COLUMNS_FILE)):
+        raise FileNotFoundError(f"❌ Model version '{version}' not found in {root}")
+    tmp_path = os.path.join(root, POINTER_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, POINTER_FILE))
+
+
+def publish(source_dir: str = ".", root: str = DEFAULT_ROOT, version: str = None, make_current: bool = True) -> str:
+    """Copy the artifacts in `source_dir` into a new version directory and (by default) activate it.
+    The version directory only appears once it is complete, so workers never load a partial copy."""
+    if not os.path.exists(os.path.join(source_dir, COLUMNS_FILE)):
+        raise FileNotFoundError(f"❌ No {COLUMNS_FILE} in '{source_dir}' to publish")
+    version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{_content_id(source_dir)}"
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"❌ Model version '{version}' already exists")
+
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name in ARTIFACTS:
+        src = os.path.join(source_dir, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(staging, name))
+        elif os.path.isfile(src):
+            shutil.copy2(src, os.path.join(staging, name))
+    os.rename(staging, target)
+
+    if make_current:
+        activate(version, root)
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="registry directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="copy the current artifacts into a new version")
+    pub.add_argument("--from", dest="source", default=".", help="directory holding the trained artifacts")
+    pub.add_argument("--version", default=None)
+    pub.add_argument("--no-activate", action="store_true", help="publish without pointing CURRENT at it")
+    act = sub.add_parser("activate", help="point CURRENT at a published version")
+    act.add_argument("version")
+    sub.add_parser("list", help="show published versions")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        version = publish(args.source, args.root, args.version, make_current=not args.no_activate)
+        state = "published and activated" if not args.no_activate else "published"
+        print(f"✅ Model version {version} {state} in {args.root}")
+    elif args.command == "activate":
+        activate(args.version, args.root)
+        print(f"✅ {os.path.join(args.root, POINTER_FILE)} -> {args.version}")
+    else:
+        current = ModelRegistry(args.root).read_pointer()
+        for version in list_versions(args.root):
+            print(f"{'*' if version == current else ' '} {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Hyperparameter sweep for the price forest: accuracy vs artifact size vs serving latency.
+
+Candidates (n_estimators x max_depth x min_samples_leaf) are fitted in parallel across a
+process pool; each worker scores its forest on the held-out split and exports the flat-array
+artifact the app serves. Size, load time and predict latency are then measured one candidate
+at a time in the parent, so timings are not skewed by other fits running next to them.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_model import ForestModel, export_forest
+
+DEFAULT_ESTIMATORS = (25, 50, 100, 200)
+DEFAULT_DEPTHS = (8, 12, 16, None)
+DEFAULT_MIN_SAMPLES_LEAF = (1, 2, 5)
+
+# Data shared with pool workers once, through the initializer
+_worker_data = {}
+
+
+def candidate_grid(estimators=DEFAULT_ESTIMATORS, depths=DEFAULT_DEPTHS, min_samples_leaf=DEFAULT_MIN_SAMPLES_LEAF) -> list:
+    return [{"n_estimators": n, "max_depth": d, "min_samples_leaf": leaf}
+            for n, d, leaf in itertools.product(estimators, depths, min_samples_leaf)]
+
+
+def candidate_name(params: dict) -> str:
+    depth = params["max_depth"] if params["max_depth"] is not None else "none"
+    return f"n{params['n_estimators']}_d{depth}_leaf{params['min_samples_leaf']}"
+
+
+def _init_worker(X_train, y_train, X_test, y_test, out_dir):
+    _worker_data.update(X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test, out_dir=out_dir)
+
+
+def _fit_candidate(params: dict) -> dict:
+    d = _worker_data
+    started = time.perf_counter()
+    # One thread per fit: the pool already provides the parallelism
+    model = RandomForestRegressor(random_state=10, n_jobs=1, **params)
+    model.fit(d["X_train"], d["y_train"])
+    fit_s = time.perf_counter() - started
+    r2 = model.score(d["X_test"], d["y_test"])
+    path = os.path.join(d["out_dir"], candidate_name(params))
+    meta = export_forest(model, path)
+    return {"params": params, "name": candidate_name(params), "r2": float(r2), "fit_s": round(fit_s, 2),
+            "n_nodes": meta["n_nodes"], "path": path}
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def measure_serving(path: str, X_test, single_repeats: int = 200, batch_rows: int = 1000) -> dict:
+    """Artifact size, load time (open + first prediction) and single-row / batch predict latency."""
+    started = time.perf_counter()
+    forest = ForestModel.load(path)
+    # /predict_price feeds a dense vector (build_vector); batches stay sparse like build_sparse_matrix
+    row = X_test[:1]
+    if hasattr(row, "toarray"):
+        row = row.toarray()
+    forest.predict(row)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    timings = np.empty(single_repeats)
+    for i in range(single_repeats):
+        t0 = time.perf_counter()
+        forest.predict(row)
+        timings[i] = time.perf_counter() - t0
+
+    reps = max(1, -(-batch_rows // X_test.shape[0]))
+    batch = X_test if reps == 1 else _stack([X_test] * reps)
+    batch = batch[:batch_rows]
+    t0 = time.perf_counter()
+    forest.predict(batch)
+    batch_ms = (time.perf_counter() - t0) * 1000
+    return {
+        "artifact_mb": round(_dir_size(path) / (1024 * 1024), 3),
+        "load_ms": round(load_ms, 2),
+        "single_row_ms": round(float(np.median(timings)) * 1000, 4),
+        "single_row_p99_ms": round(float(np.percentile(timings, 99)) * 1000, 4),
+        f"batch_{batch_rows}_ms": round(batch_ms, 2),
+    }
+
+
+def _stack(blocks):
+    import scipy.sparse as sp
+    return sp.vstack(blocks).tocsr() if sp.issparse(blocks[0]) else np.vstack(blocks)
+
+
+def pareto_front(results: list) -> list:
+    """Names of candidates not dominated on (higher R², lower single-row latency, smaller artifact)."""
+    front = []
+    for a in results:
+        dominated = any(
+            b is not a
+            and b["r2"] >= a["r2"] and b["single_row_ms"] <= a["single_row_ms"] and b["artifact_mb"] <= a["artifact_mb"]
+            and (b["r2"] > a["r2"] or b["single_row_ms"] < a["single_row_ms"] or b["artifact_mb"] < a["artifact_mb"])
+            for b in results)
+        if not dominated:
+            front.append(a["name"])
+    return front
+
+
+def select_by_budget(results: list, latency_budget_ms: float):
+    """Most accurate candidate whose median single-row latency fits the budget (None if none does)."""
+    fitting = [r for r in results if r["single_row_ms"] <= latency_budget_ms]
+    if not fitting:
+        return None
+    return max(fitting, key=lambda r: (r["r2"], -r["single_row_ms"], -r["artifact_mb"]))
+
+
+def run_sweep(X_train, y_train, X_test, y_test, candidates: list, workers: int = None) -> list:
+    """Fit every candidate in a process pool, then measure serving cost serially."""
+    out_dir = tempfile.mkdtemp(prefix="forest_sweep_")
+    workers = workers or os.cpu_count() or 1
+    fitted = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X_train, y_train, X_test, y_test, out_dir)) as pool:
+            futures = [pool.submit(_fit_candidate, params) for params in candidates]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                fitted.append(result)
+                print(f"🌲 [{done}/{len(candidates)}] {result['name']}: R^2 {result['r2']:.4f} ({result['fit_s']}s)")
+
+        results = []
+        for result in sorted(fitted, key=lambda r: r["name"]):
+            result.update(measure_serving(result.pop("path"), X_test))
+            results.append(result)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    front = set(pareto_front(results))
+    for result in results:
+        result["pareto"] = result["name"] in front
+    return results
+
+
+def print_report(results: list, selected=None):
+    print(f"\n{'candidate':<20} {'R^2':>7} {'nodes':>8} {'MB':>7} {'load ms':>8} {'row ms':>8} {'batch ms':>9}  pareto")
+    batch_key = next((k for k in results[0] if k.startswith("batch_")), None) if results else None
+    for r in sorted(results, key=lambda r: r["single_row_ms"]):
+        mark = "  ★" if r["pareto"] else ""
+        chosen = "  ← selected" if selected is not None and r["name"] == selected["name"] else ""
+        print(f"{r['name']:<20} {r['r2']:>7.4f} {r['n_nodes']:>8} {r['artifact_mb']:>7.2f} {r['load_ms']:>8.1f} "
+              f"{r['single_row_ms']:>8.3f} {r.get(batch_key, 0):>9.1f}{mark}{chosen}")
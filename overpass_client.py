@@ -0,0 +1,186 @@
+"""Concurrent Overpass API client: races or hedges requests across mirrors.
+
+Each mirror's latency (EWMA) and error rate are tracked, and mirrors are tried fastest-healthy
+first. In "hedged" mode the next mirror is only fired if the current ones have not answered
+within `hedge_delay` seconds (or as soon as one fails / comes back empty); "race" fires all
+mirrors at once; "sequential" reproduces the old one-after-another behaviour.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from metrics import observe_upstream, request_log
+
+DEFAULT_ENDPOINTS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+    "https://lz4.overpass-api.de/api/interpreter",
+]
+FETCH_MODES = ("hedged", "race", "sequential")
+
+
+class MirrorStats:
+    """Running health numbers for one mirror."""
+
+    # Weight of the newest sample in the latency moving average
+    ALPHA = 0.3
+
+    def __init__(self, url: str):
+        self.url = url
+        self.requests = 0
+        self.errors = 0
+        self.empty = 0
+        self.ewma_latency = None
+        # Start times of requests still waiting for an answer
+        self.in_flight = []
+
+    def start(self) -> float:
+        started = time.perf_counter()
+        self.in_flight.append(started)
+        return started
+
+    def record(self, started: float, ok: bool, empty: bool = False):
+        latency = time.perf_counter() - started
+        self.in_flight.remove(started)
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        elif empty:
+            self.empty += 1
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.ALPHA * latency + (1 - self.ALPHA) * self.ewma_latency
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def score(self, timeout: float) -> float:
+        """Expected cost in seconds: latency, with errors counted as a full timeout.
+        A request that is still pending counts as at least as slow as it has been so far;
+        untried, idle mirrors score 0 so each mirror gets sampled at least once.
+        """
+        pending = time.perf_counter() - min(self.in_flight) if self.in_flight else 0.0
+        if self.ewma_latency is None:
+            return pending
+        expected = (1 - self.error_rate) * self.ewma_latency + self.error_rate * timeout
+        return max(expected, pending)
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "requests": self.requests,
+            "errors": self.errors,
+            "empty": self.empty,
+            "error_rate": round(self.error_rate, 4),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "in_flight": len(self.in_flight),
+        }
+
+
+class OverpassClient:
+    """Fetch Overpass elements from the first mirror that returns a non-empty result."""
+
+    def __init__(self, endpoints=None, mode: str = "hedged", timeout: float = 30.0,
+                 hedge_delay: float = 2.0, user_agent: str = "Bangalore Property App/1.0"):
+        if mode not in FETCH_MODES:
+            raise ValueError(f"❌ Unknown Overpass fetch mode '{mode}' (expected one of {FETCH_MODES})")
+        self.endpoints = list(endpoints or DEFAULT_ENDPOINTS)
+        self.mode = mode
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.headers = {'User-Agent': user_agent}
+        self._stats = {url: MirrorStats(url) for url in self.endpoints}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # Losing hedged requests keep running in the background; size the pool so they cannot
+        # starve new lookups
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix="overpass")
+
+    def ranked_endpoints(self) -> list:
+        """Mirrors ordered by expected cost (fastest healthy first, configured order on ties)."""
+        with self._lock:
+            return sorted(self.endpoints, key=lambda url: self._stats[url].score(self.timeout))
+
+    def stats(self) -> list:
+        with self._lock:
+            return [self._stats[url].as_dict() for url in self.endpoints]
+
+    def _post(self, url: str, query: str) -> list:
+        with self._lock:
+            started = self._stats[url].start()
+        try:
+            resp = self._session.post(url, data={"data": query}, headers=self.headers, timeout=self.timeout)
+            resp.raise_for_status()
+            elements = resp.json().get('elements', [])
+        except Exception as e:
+            observe_upstream("overpass", url, time.perf_counter() - started, "error")
+            with self._lock:
+                self._stats[url].record(started, ok=False)
+            # Keep the response body around for debugging, like the old loop did
+            resp_obj = getattr(e, 'response', None)
+            extra = f" Response text: {resp_obj.text[:500]}" if resp_obj is not None and hasattr(resp_obj, 'text') else ''
+            print(f"⚠️ Overpass endpoint {url} failed: {e}{extra}")
+            raise
+        observe_upstream("overpass", url, time.perf_counter() - started, "ok" if elements else "empty")
+        with self._lock:
+            self._stats[url].record(started, ok=True, empty=not elements)
+        return elements
+
+    def fetch(self, query: str):
+        """Return (elements, url) from the first mirror with results, or ([], None) if none had any."""
+        order = self.ranked_endpoints()
+        if self.mode == "sequential":
+            for url in order:
+                request_log(f"🔎 Querying Overpass at {url}")
+                try:
+                    elements = self._post(url, query)
+                except Exception:
+                    continue
+                if elements:
+                    return elements, url
+                request_log(f"⚠️ No results from {url}")
+            return [], None
+
+        hedge_delay = 0.0 if self.mode == "race" else self.hedge_delay
+        futures = {}
+        remaining = list(order)
+        deadline = time.monotonic() + self.timeout + hedge_delay * len(order)
+
+        def launch():
+            url = remaining.pop(0)
+            request_log(f"🔎 Querying Overpass at {url}")
+            futures[self._executor.submit(self._post, url, query)] = url
+
+        launch()
+        while futures:
+            if hedge_delay == 0:
+                while remaining:
+                    launch()
+            wait_for = hedge_delay if remaining else max(deadline - time.monotonic(), 0)
+            done, _ = wait(list(futures), timeout=wait_for, return_when=FIRST_COMPLETED)
+            if not done:
+                if remaining:
+                    # Hedge: the mirrors in flight are slow, fire the next one as well
+                    launch()
+                    continue
+                break
+            for future in done:
+                url = futures.pop(future)
+                try:
+                    elements = future.result()
+                except Exception:
+                    continue
+                if elements:
+                    return elements, url
+                request_log(f"⚠️ No results from {url}")
+            # A mirror failed or came back empty: move on without waiting for the hedge timer
+            if remaining:
+                launch()
+        return [], None
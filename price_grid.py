@@ -0,0 +1,115 @@
+"""Precomputed price table over the common (location, bath, bhk, sqft) input space.
+
+The table holds the model's own float64 outputs, so an in-grid lookup returns exactly what
+the forest would. Queries off the grid (odd sqft, more rooms than the form offers, property
+age as a model feature) return None and the caller falls back to the model.
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def build_price_grid(forest, schema, path: str, sqft_min: int = 300, sqft_max: int = 5000,
+                     sqft_step: int = 10, max_rooms: int = 5) -> dict:
+    """Evaluate `forest` over every grid point and write table.npy + meta.json to `path`.
+
+    Location axis 0 is "other" (no one-hot column set); axis i > 0 is schema.locations[i - 1].
+    """
+    if schema.age_index is not None:
+        raise ValueError("❌ Price grid does not cover models that use property_age as a feature.")
+    sqft_values = np.arange(sqft_min, sqft_max + 1, sqft_step, dtype=np.float64)
+    rooms = np.arange(1, max_rooms + 1, dtype=np.float64)
+    location_columns = [None] + [schema.location_column(name) for name in schema.locations]
+
+    # One block of rows per location: every (bath, bhk, sqft) combination
+    bath_grid, bhk_grid, sqft_grid = np.meshgrid(rooms, rooms, sqft_values, indexing="ij")
+    block = np.zeros((bath_grid.size, schema.n_features))
+    block[:, schema.bath_index] = bath_grid.ravel()
+    block[:, schema.bhk_index] = bhk_grid.ravel()
+    block[:, schema.sqft_index] = sqft_grid.ravel()
+
+    table = np.empty((len(location_columns), max_rooms, max_rooms, len(sqft_values)))
+    for i, col in enumerate(location_columns):
+        if col is not None:
+            block[:, col] = 1
+        table[i] = forest.predict(block).reshape(max_rooms, max_rooms, len(sqft_values))
+        if col is not None:
+            block[:, col] = 0
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "table.npy"), table)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "sqft_min": sqft_min,
+        "sqft_max": sqft_max,
+        "sqft_step": sqft_step,
+        "max_rooms": max_rooms,
+        "columns": list(schema.columns),
+        "forest_fingerprint": forest.fingerprint(),
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+class PriceGrid:
+    """Memory-mapped lookup table produced by build_price_grid."""
+
+    def __init__(self, table: np.ndarray, meta: dict, schema):
+        self.table = table
+        self.meta = meta
+        self.sqft_min = meta["sqft_min"]
+        self.sqft_max = meta["sqft_max"]
+        self.sqft_step = meta["sqft_step"]
+        self.max_rooms = meta["max_rooms"]
+        # Map a one-hot column index (or None for "other") to the table's location axis
+        self._location_axis = {schema.location_column(name): i + 1 for i, name in enumerate(schema.locations)}
+        self._location_axis[None] = 0
+
+    @classmethod
+    def load(cls, path: str, schema, forest) -> "PriceGrid":
+        """Load the grid, refusing one that was built for a different model or column layout."""
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"❌ Unsupported price grid version: {meta.get('format_version')}")
+        if meta["columns"] != list(schema.columns):
+            raise ValueError("❌ Price grid was built for a different columns.json.")
+        if meta["forest_fingerprint"] != forest.fingerprint():
+            raise ValueError("❌ Price grid was built for a different model.")
+        table = np.load(os.path.join(path, "table.npy"), mmap_mode="r")
+        return cls(table, meta, schema)
+
+    def lookup(self, location_column, sqft: float, bath: int, bhk: int):
+        """Base price for an in-grid query, or None if the point is not in the table."""
+        if not (1 <= bath <= self.max_rooms and 1 <= bhk <= self.max_rooms):
+            return None
+        if not (self.sqft_min <= sqft <= self.sqft_max):
+            return None
+        offset = sqft - self.sqft_min
+        if offset % self.sqft_step:
+            return None
+        loc = self._location_axis.get(location_column)
+        if loc is None:
+            return None
+        return float(self.table[loc, bath - 1, bhk - 1, int(offset // self.sqft_step)])
+
+
+if __name__ == "__main__":
+    # Usage: python price_grid.py [forest_dir] [columns.json] [output_dir]
+    from feature_schema import FeatureSchema
+    from forest_model import ForestModel
+
+    forest_path = sys.argv[1] if len(sys.argv) > 1 else "banglore_home_prices_model.forest"
+    columns_path = sys.argv[2] if len(sys.argv) > 2 else "columns.json"
+    output_path = sys.argv[3] if len(sys.argv) > 3 else "banglore_home_prices_model.grid"
+
+    start = time.perf_counter()
+    grid_meta = build_price_grid(ForestModel.load(forest_path), FeatureSchema.from_file(columns_path), output_path)
+    size_mb = os.path.getsize(os.path.join(output_path, "table.npy")) / (1024 * 1024)
+    print(f"✅ Price grid written to {output_path} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,30 @@
+"""Offline job: re-price saved favorites with the current model (e.g. after publishing a new version).
+
+Usage: python reprice_favorites.py [--user-id N] [--all] [--batch-size 5000]
+
+Without --user-id every favorite in the table is processed; without --all rows already priced
+by the active model version are skipped, so the job can be re-run safely.
+"""
+import argparse
+import time
+
+from app import app, reprice_favorites
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None, help="only this user's favorites")
+    parser.add_argument("--all", action="store_true", help="also re-price rows the active version already priced")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per model call and UPDATE")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with app.app_context():
+        summary = reprice_favorites(args.user_id, stale_only=not args.all, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Re-priced {summary['repriced']} favorites with model {summary['model_version']} "
+          f"({summary['changed']} changed, {summary['batches']} batches) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
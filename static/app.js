@@ -355,21 +355,29 @@ function saveFavorite() {
 }
 
 
-// Load Favorites with Card UI
-function loadFavorites() {
-    fetch("/get_favorites")
+// Load Favorites with Card UI (one page per call; a cursor appends the next page)
+function loadFavorites(cursor) {
+    const url = cursor ? `/get_favorites?cursor=${encodeURIComponent(cursor)}` : "/get_favorites";
+    // Bring saved prices up to date with the current model before showing the first page
+    const repriced = cursor ? Promise.resolve() : fetch("/reprice_favorites", { method: "POST" }).catch(() => {});
+    repriced
+        .then(() => fetch(url))
         .then(response => response.json())
         .then(data => {
             let favoritesList = document.getElementById("favoritesList");
-            favoritesList.innerHTML = "";
+            document.getElementById("loadMoreFavoritesBtn")?.remove();
+            if (!cursor) {
+                favoritesList.innerHTML = "";
+                window.allFavorites = [];
+            }
 
-            if (!data.favorites || data.favorites.length === 0) {
+            if (!cursor && (!data.favorites || data.favorites.length === 0)) {
                 favoritesList.innerHTML = "<p class='placeholder-text'>No saved properties found. Start by estimating a price!</p>";
                 return;
             }
 
             // Store favorites globally for easy access during comparison
-            window.allFavorites = data.favorites;
+            window.allFavorites = window.allFavorites.concat(data.favorites);
 
             data.favorites.forEach(fav => {
                 let favItem = document.createElement("div");
@@ -401,6 +409,15 @@ function loadFavorites() {
 
                 favoritesList.appendChild(favItem);
             });
+
+            if (data.next_cursor) {
+                let moreBtn = document.createElement("button");
+                moreBtn.id = "loadMoreFavoritesBtn";
+                moreBtn.classList.add("action-btn");
+                moreBtn.textContent = "Load more";
+                moreBtn.onclick = () => loadFavorites(data.next_cursor);
+                favoritesList.appendChild(moreBtn);
+            }
         })
         .catch(error => console.error("Error loading favorites:", error));
 }
@@ -1,4 +1,3 @@
-
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -7,121 +6,431 @@ from sklearn.preprocessing import StandardScaler
 import pickle
 import json
 import os
+from feature_schema import FeatureSchema
+from forest_model import ForestModel, export_forest
+from price_grid import build_price_grid
+from feature_store import FeatureStore, group_moments, combine_moments
+import model_sweep
+import model_registry
+from training_state import TrainingState
+import argparse
+
+DATA_FILE = "BHP.csv"
+OUTPUT_MODEL_FILE = "banglore_home_prices_model.pickle"
+OUTPUT_FOREST_DIR = "banglore_home_prices_model.forest"
+OUTPUT_GRID_DIR = "banglore_home_prices_model.grid"
+COLUMNS_FILE = "columns.json"
+FEATURE_STORE_FILE = "feature_store.npz"
+
+# Rows per read_csv chunk in --chunked mode
+CHUNK_SIZE = 100_000
+RAW_COLUMNS = ['location', 'size', 'total_sqft', 'bath', 'price']
+
+# Locations with this many listings or fewer are bucketed into 'other'
+MIN_LOCATION_COUNT = 10
+
+# Deployed forest shape; --sweep measures the alternatives
+DEFAULT_PARAMS = {"n_estimators": 100, "max_depth": 12, "min_samples_leaf": 1}
+SWEEP_REPORT_FILE = "model_sweep_report.json"
+TRAINING_STATE_FILE = "training_state.npz"
+
+
+# --- Preprocessing stages (each takes and returns a DataFrame, all vectorized) ---
+
+def map_distinct(values: pd.Series, parse) -> pd.Series:
+    """Run a vectorized string parser on the distinct values only and broadcast the result back.
+    Listing columns are highly repetitive, so this scales with the number of distinct strings.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object)).to_numpy()
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def convert_sqft_to_num(sqft: pd.Series) -> pd.Series:
+    """Parse total_sqft strings: plain numbers as-is, 'a - b' ranges as their midpoint, anything else NaN."""
+    text = sqft.astype(str)
+    single = pd.to_numeric(text, errors='coerce')
+    bounds = text.str.split('-', n=1, expand=True).reindex(columns=[0, 1])
+    is_range = text.str.count('-') == 1
+    midpoint = (pd.to_numeric(bounds[0], errors='coerce') + pd.to_numeric(bounds[1], errors='coerce')) / 2
+    return midpoint.where(is_range, single)
+
+
+def clean_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-local cleaning: drop unused columns and missing values, parse sqft/bhk, add price per sqft."""
+    df = df.drop(['area_type', 'society', 'balcony', 'availability'], axis='columns', errors='ignore').dropna()
+    df = df.assign(
+        total_sqft=map_distinct(df['total_sqft'], convert_sqft_to_num).astype(float),
+        # Extract BHK from size ("2 BHK", "4 Bedroom")
+        bhk=map_distinct(df['size'], lambda size: size.str.split(' ', n=1).str[0].astype(int)).astype(int),
+    ).dropna()
+
+    # Feature Engineering: Price per sqft (for outlier removal)
+    df['price_per_sqft'] = df['price'] * 100000 / df['total_sqft']
+    df['location'] = map_distinct(df['location'], lambda loc: loc.str.strip())
+    return df
+
+
+def clean_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-local cleaning plus bucketing of rare locations into 'other'."""
+    df = clean_rows(df)
+
+    # Dimensionality Reduction: Location
+    location_stats = df['location'].value_counts()
+    rare = location_stats.index[location_stats <= MIN_LOCATION_COUNT]
+    df['location'] = df['location'].mask(df['location'].isin(rare), 'other')
+    return df
+
+
+def remove_small_units(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop listings with less than 300 sqft per bedroom."""
+    return df[~(df.total_sqft / df.bhk < 300)]
+
+
+def price_per_sqft_stats(pps: np.ndarray, group: np.ndarray) -> pd.DataFrame:
+    """Mean, population std and count of price_per_sqft per integer group id (indexed by id).
+    Reduces each group with np.mean/np.std (pairwise sums), so boundary decisions match the
+    original per-group loops bit for bit; pandas' own groupby mean/std round differently.
+    """
+    grouped = pd.Series(pps).groupby(group, sort=False)
+    return grouped.agg(
+        mean=lambda s: np.mean(s.to_numpy()),
+        std=lambda s: np.std(s.to_numpy()),
+        count='size',
+    )
+
+
+def remove_pps_outliers(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep rows within one (population) std of their location's mean price per sqft.
+    Output is ordered by location, then original order, with a fresh index.
+    """
+    # Sorted factorization: code order == alphabetical location order
+    codes, _ = pd.factorize(df['location'], sort=True)
+    pps = df['price_per_sqft'].to_numpy()
+    stats = price_per_sqft_stats(pps, codes).reindex(np.arange(codes.max() + 1))
+    m = stats['mean'].to_numpy()[codes]
+    st = stats['std'].to_numpy()[codes]
+    keep = np.nonzero((pps > (m - st)) & (pps <= (m + st)))[0]
+    keep = keep[np.argsort(codes[keep], kind='stable')]
+    return df.iloc[keep].reset_index(drop=True)
+
+
+def bhk_outlier_mask(location_code: np.ndarray, bhk: np.ndarray, pps: np.ndarray) -> np.ndarray:
+    """True for n-BHK rows priced per sqft below the mean of the (n-1)-BHK rows in the same
+    location, when that location has more than 5 (n-1)-BHK rows.
+    """
+    bhk = bhk.astype(np.int64)
+    # One integer key per (location, bhk); stats for (location, bhk - 1) are found by key - 1
+    span = int(bhk.max()) - int(bhk.min()) + 2
+    key = location_code.astype(np.int64) * span + (bhk - bhk.min() + 1)
+    stats = price_per_sqft_stats(pps, key).reindex(key - 1)
+    return (stats['count'].to_numpy() > 5) & (pps < stats['mean'].to_numpy())
+
+
+def remove_bhk_outliers(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop n-BHK listings priced per sqft below the mean of (n-1)-BHK listings in the same location."""
+    codes, _ = pd.factorize(df['location'])
+    exclude = bhk_outlier_mask(codes, df['bhk'].to_numpy(), df['price_per_sqft'].to_numpy())
+    return df[~exclude]
+
+
+def preprocess(df: pd.DataFrame) -> pd.DataFrame:
+    """Full cleaning + outlier pipeline; returns location/size/total_sqft/bath/price/bhk rows."""
+    df = clean_data(df)
+    df = remove_small_units(df)
+    df = remove_pps_outliers(df)
+    df = remove_bhk_outliers(df)
+    return df.drop(['price_per_sqft'], axis='columns')
 
-# 1. Load Data
-print("⏳ Loading data...")
-try:
-    df = pd.read_csv("BHP.csv")
-    print(f"✅ Data loaded. Shape: {df.shape}")
-except FileNotFoundError:
-    print("❌ BHP.csv not found!")
-    exit()
-
-# 2. Data Cleaning & Feature Engineering
-print("🧹 Cleaning data...")
-
-# Drop unnecessary columns
-df2 = df.drop(['area_type', 'society', 'balcony', 'availability'], axis='columns')
-
-# Handle missing values
-df3 = df2.dropna()
-
-# Function to convert 'total_sqft' to float
-def convert_sqft_to_num(x):
-    tokens = str(x).split('-')
-    if len(tokens) == 2:
-        return (float(tokens[0]) + float(tokens[1])) / 2
-    try:
-        return float(x)
-    except:
+
+def build_features(df: pd.DataFrame):
+    """One-hot encode location ('other' is the all-zero baseline) and split off the target."""
+    dummies = pd.get_dummies(df.location)
+    features = pd.concat([df, dummies.drop('other', axis='columns', errors='ignore')], axis='columns')
+    features = features.drop(['location', 'size'], axis='columns')
+    X = features.drop('price', axis='columns')
+    y = features.price
+    return X, y
+
+
+def split_data(X, y):
+    return train_test_split(X, y, test_size=0.2, random_state=10)
+
+
+def train_model(X, y, params=None):
+    X_train, X_test, y_train, y_test = split_data(X, y)
+
+    # Limiting depth and estimators significantly reduces model size (see --sweep for the trade-off).
+    model = RandomForestRegressor(random_state=10, n_jobs=-1, **(params or DEFAULT_PARAMS))
+    model.fit(X_train, y_train)
+
+    score = model.score(X_test, y_test)
+    print(f"🎯 Model Accuracy (R^2): {score:.4f}")
+    return model
+
+
+def read_chunks(path: str, chunksize: int):
+    return pd.read_csv(path, usecols=RAW_COLUMNS, chunksize=chunksize,
+                       dtype={'location': str, 'size': str, 'total_sqft': str})
+
+
+def ingest_chunked(path: str = DATA_FILE, chunksize: int = CHUNK_SIZE) -> FeatureStore:
+    """Two streaming passes over the CSV that produce the same rows as preprocess(), compactly.
+
+    Pass 1 counts listings per location and accumulates mergeable price-per-sqft moments per
+    raw location. Pass 2 re-reads the file, applies the location bucketing and the pps filter,
+    and keeps only typed arrays. The bhk filter then runs on those arrays. Peak memory is one
+    chunk plus the compact store, independent of the number of locations.
+    """
+    # Pass 1: location frequencies and per-location pps moments
+    location_counts = None
+    raw_stats = None
+    for chunk in read_chunks(path, chunksize):
+        rows = clean_rows(chunk)
+        counts = rows['location'].value_counts()
+        location_counts = counts if location_counts is None else location_counts.add(counts, fill_value=0)
+        rows = remove_small_units(rows)
+        raw_stats = combine_moments(raw_stats, group_moments(rows['price_per_sqft'], rows['location']))
+
+    bucket = pd.Series(np.where(location_counts > MIN_LOCATION_COUNT, location_counts.index, 'other'),
+                       index=location_counts.index)
+    locations = sorted(set(bucket))
+    code_of = pd.Series(np.arange(len(locations)), index=locations)
+    raw_codes = code_of[bucket[raw_stats.index]].to_numpy()
+
+    # Merge raw-location moments into their buckets: M2 = sum(m2_i) + sum(n_i * (mean_i - mean)^2)
+    n_i = raw_stats['count'].to_numpy()
+    n = np.bincount(raw_codes, weights=n_i, minlength=len(locations))
+    mean = np.bincount(raw_codes, weights=n_i * raw_stats['mean'].to_numpy(), minlength=len(locations)) / np.maximum(n, 1)
+    m2 = (np.bincount(raw_codes, weights=raw_stats['m2'].to_numpy(), minlength=len(locations))
+          + np.bincount(raw_codes, weights=n_i * (raw_stats['mean'].to_numpy() - mean[raw_codes]) ** 2, minlength=len(locations)))
+    std = np.sqrt(m2 / np.maximum(n, 1))
+
+    # Pass 2: bucket, pps filter, keep typed columns only
+    parts = []
+    for chunk in read_chunks(path, chunksize):
+        rows = remove_small_units(clean_rows(chunk))
+        codes = code_of[bucket[rows['location']].to_numpy()].to_numpy()
+        pps = rows['price_per_sqft'].to_numpy()
+        keep = (pps > (mean[codes] - std[codes])) & (pps <= (mean[codes] + std[codes]))
+        parts.append((
+            codes[keep].astype(np.int32),
+            rows['total_sqft'].to_numpy()[keep].astype(np.float32),
+            rows['bath'].to_numpy()[keep],
+            rows['bhk'].to_numpy()[keep],
+            rows['price'].to_numpy()[keep],
+            pps[keep],
+        ))
+    codes, sqft, bath, bhk, price, pps = (np.concatenate(col) for col in zip(*parts))
+
+    # Same row order as remove_pps_outliers: by location, then file order
+    order = np.argsort(codes, kind='stable')
+    codes, sqft, bath, bhk, price, pps = (a[order] for a in (codes, sqft, bath, bhk, price, pps))
+
+    keep = ~bhk_outlier_mask(codes, bhk, pps)
+    return FeatureStore.from_arrays(codes[keep], sqft[keep], bath[keep], bhk[keep], price[keep], locations)
+
+
+def update_training_state(path: str, state_file: str):
+    """Load the incremental state and fold in rows appended to `path` since the last run
+    (bootstrapping it from the whole file the first time). Returns (state, summary), with
+    summary None when nothing new arrived.
+    """
+    if os.path.exists(state_file):
+        state = TrainingState.load(state_file)
+        raw = state.read_appended(path)
+        print(f"⏳ {len(raw)} new raw rows since the last run")
+        if raw.empty:
+            return state, None
+        clean = clean_rows(raw)
+        touched = state.append_clean(clean, remove_small_units(clean))
+    else:
+        print(f"⏳ No {state_file} yet: cleaning the full file once...")
+        state = TrainingState.empty(MIN_LOCATION_COUNT)
+        clean = clean_rows(pd.read_csv(path))
+        state.append_clean(clean, remove_small_units(clean))
+        state.mark_consumed(path)
+        # Every location is new: filter them all
+        touched = None
+    return state, state.update_filters(touched)
+
+
+def extend_model(X, y, add_trees: int, max_trees: int):
+    """Warm-start the deployed forest with `add_trees` new trees fitted on the updated data.
+    Returns None when it should be refitted instead (missing model, different columns, or the
+    forest would grow past max_trees)."""
+    if not os.path.exists(OUTPUT_MODEL_FILE):
         return None
+    with open(OUTPUT_MODEL_FILE, 'rb') as f:
+        model = pickle.load(f)
+    if getattr(model, 'n_features_in_', None) != X.shape[1]:
+        return None
+    n_trees = len(model.estimators_) + add_trees
+    if n_trees > max_trees:
+        print(f"🌲 Forest would pass {max_trees} trees; refitting from scratch")
+        return None
+    # Older pickles lack attributes newer sklearn expects when fitting more trees
+    for est in [model] + list(model.estimators_):
+        if not hasattr(est, 'monotonic_cst'):
+            est.monotonic_cst = None
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    model.set_params(warm_start=True, n_estimators=n_trees, n_jobs=-1)
+    model.fit(X_train, y_train)
+    model.set_params(warm_start=False)
+    print(f"🎯 Model Accuracy (R^2): {model.score(X_test, y_test):.4f} ({n_trees} trees, {add_trees} new)")
+    return model
+
 
-df4 = df3.copy()
-df4['total_sqft'] = df4['total_sqft'].apply(convert_sqft_to_num)
+def save_artifacts(model, feature_columns):
+    with open(OUTPUT_MODEL_FILE, 'wb') as f:
+        pickle.dump(model, f)
 
-# Extract BHK from size
-df4['bhk'] = df4['size'].apply(lambda x: int(x.split(' ')[0]))
+    columns = {
+        'data_columns': [col.lower() for col in feature_columns]
+    }
+    with open(COLUMNS_FILE, "w") as f:
+        f.write(json.dumps(columns))
 
-df4 = df4.dropna() 
+    # Export flat node arrays for memory-mapped serving (app.py prefers these over the pickle)
+    forest_meta = export_forest(model, OUTPUT_FOREST_DIR)
+    print(f"🌲 Exported {forest_meta['n_trees']} trees ({forest_meta['n_nodes']} nodes) to {OUTPUT_FOREST_DIR}")
 
-# Feature Engineering: Price per sqft (for outlier removal)
-df5 = df4.copy()
-df5['price_per_sqft'] = df5['price'] * 100000 / df5['total_sqft']
+    # Precompute the price table for the form's input space (served by lookup instead of the model)
+    grid_meta = build_price_grid(ForestModel.load(OUTPUT_FOREST_DIR), FeatureSchema.from_columns(columns['data_columns']), OUTPUT_GRID_DIR)
+    print(f"🗺️ Price grid written to {OUTPUT_GRID_DIR} (sqft {grid_meta['sqft_min']}-{grid_meta['sqft_max']} step {grid_meta['sqft_step']}, up to {grid_meta['max_rooms']} bath/bhk)")
 
-# Dimensionality Reduction: Location
-df5['location'] = df5['location'].apply(lambda x: x.strip())
-location_stats = df5['location'].value_counts(ascending=False)
-location_stats_less_than_10 = location_stats[location_stats <= 10]
-df5['location'] = df5['location'].apply(lambda x: 'other' if x in location_stats_less_than_10 else x)
+    # Check size
+    size_mb = os.path.getsize(OUTPUT_MODEL_FILE) / (1024 * 1024)
+    print(f"📦 Model saved to {OUTPUT_MODEL_FILE}")
+    print(f"START_SIZE:{size_mb:.2f}MB:END_SIZE")
 
-# Outlier Removal
-df6 = df5[~(df5.total_sqft / df5.bhk < 300)]
 
-def remove_pps_outliers(df):
-    df_out = pd.DataFrame()
-    for key, subdf in df.groupby('location'):
-        m = np.mean(subdf.price_per_sqft)
-        st = np.std(subdf.price_per_sqft)
-        reduced_df = subdf[(subdf.price_per_sqft > (m - st)) & (subdf.price_per_sqft <= (m + st))]
-        df_out = pd.concat([df_out, reduced_df], ignore_index=True)
-    return df_out
+def _int_list(text: str) -> list:
+    """'8,12,none' -> [8, 12, None]"""
+    return [None if v.strip().lower() == "none" else int(v) for v in text.split(",")]
 
-df7 = remove_pps_outliers(df6)
 
-def remove_bhk_outliers(df):
-    exclude_indices = np.array([])
-    for location, location_df in df.groupby('location'):
-        bhk_stats = {}
-        for bhk, bhk_df in location_df.groupby('bhk'):
-            bhk_stats[bhk] = {
-                'mean': np.mean(bhk_df.price_per_sqft),
-                'std': np.std(bhk_df.price_per_sqft),
-                'count': bhk_df.shape[0]
-            }
-        for bhk, bhk_df in location_df.groupby('bhk'):
-            stats = bhk_stats.get(bhk - 1)
-            if stats and stats['count'] > 5:
-                exclude_indices = np.append(exclude_indices, bhk_df[bhk_df.price_per_sqft < (stats['mean'])].index.values)
-    return df.drop(exclude_indices, axis='index')
+def sweep(X, y, args):
+    """Run the hyperparameter sweep; returns the params picked by the latency budget (or None)."""
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    candidates = model_sweep.candidate_grid(_int_list(args.sweep_estimators), _int_list(args.sweep_depths),
+                                            _int_list(args.sweep_min_samples_leaf))
+    print(f"🔬 Sweeping {len(candidates)} candidates on {args.workers or os.cpu_count()} processes...")
+    results = model_sweep.run_sweep(X_train, y_train, X_test, y_test, candidates, workers=args.workers)
 
-df8 = remove_bhk_outliers(df7)
-df9 = df8.drop(['price_per_sqft'], axis='columns')
+    selected = None
+    if args.latency_budget_ms is not None:
+        selected = model_sweep.select_by_budget(results, args.latency_budget_ms)
+    model_sweep.print_report(results, selected)
 
-# One Hot Encoding
-dummies = pd.get_dummies(df9.location)
-df10 = pd.concat([df9, dummies.drop('other', axis='columns')], axis='columns')
-df11 = df10.drop(['location', 'size'], axis='columns')
+    with open(args.sweep_report, "w") as f:
+        json.dump({"latency_budget_ms": args.latency_budget_ms, "selected": selected["name"] if selected else None,
+                   "pareto_front": [r["name"] for r in results if r["pareto"]], "candidates": results}, f, indent=2)
+    print(f"📝 Sweep report written to {args.sweep_report}")
+
+    if args.latency_budget_ms is None:
+        return None
+    if selected is None:
+        print(f"❌ No candidate predicts a single row within {args.latency_budget_ms} ms; nothing deployed.")
+        return None
+    print(f"✅ Selected {selected['name']} (R^2 {selected['r2']:.4f}, {selected['single_row_ms']:.3f} ms/row, "
+          f"{selected['artifact_mb']:.2f} MB) for a {args.latency_budget_ms} ms budget")
+    return selected["params"]
 
-print(f"✅ Preprocessing done. Final Shape: {df11.shape}")
 
-# 3. Model Training
-X = df11.drop('price', axis='columns')
-y = df11.price
+def main():
+    parser = argparse.ArgumentParser(description="Train the Bangalore house price model.")
+    parser.add_argument("--data", default=DATA_FILE, help="listings CSV")
+    parser.add_argument("--chunked", action="store_true",
+                        help="stream the CSV in two passes into a compact feature store (for data larger than memory)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dense", action="store_true",
+                        help="fit on a dense float32 matrix instead of the sparse (CSR) one")
+    parser.add_argument("--feature-store", default=None,
+                        help=f"also write the compact feature store (e.g. {FEATURE_STORE_FILE})")
+    parser.add_argument("--sweep", action="store_true",
+                        help="sweep estimators/depth/min-samples-leaf and report R^2, size, load time and latency")
+    parser.add_argument("--sweep-estimators", default=",".join(map(str, model_sweep.DEFAULT_ESTIMATORS)))
+    parser.add_argument("--sweep-depths", default=",".join(str(d).lower() for d in model_sweep.DEFAULT_DEPTHS))
+    parser.add_argument("--sweep-min-samples-leaf", default=",".join(map(str, model_sweep.DEFAULT_MIN_SAMPLES_LEAF)))
+    parser.add_argument("--workers", type=int, default=None, help="sweep processes (default: all CPUs)")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="with --sweep: train and deploy the most accurate candidate within this single-row latency")
+    parser.add_argument("--sweep-report", default=SWEEP_REPORT_FILE)
+    parser.add_argument("--incremental", action="store_true",
+                        help="clean only rows appended to --data since the last run, re-filter changed locations "
+                             "and warm-start new trees")
+    parser.add_argument("--state", default=TRAINING_STATE_FILE, help="incremental training state file")
+    parser.add_argument("--add-trees", type=int, default=20, help="trees added per incremental run")
+    parser.add_argument("--max-trees", type=int, default=300,
+                        help="refit from scratch instead of extending once the forest would exceed this")
+    parser.add_argument("--refit", action="store_true", help="with --incremental: refit the forest instead of extending it")
+    parser.add_argument("--publish", action="store_true",
+                        help="copy the new artifacts into the model registry and make them current (hot-reloaded by the app)")
+    parser.add_argument("--registry", default=model_registry.DEFAULT_ROOT, help="model registry directory for --publish")
+    args = parser.parse_args()
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=10)
+    if not os.path.exists(args.data):
+        print(f"❌ {args.data} not found!")
+        exit()
 
+    if args.incremental:
+        # 1-2. Only the appended rows are parsed; outlier filters re-run for touched locations only
+        state, summary = update_training_state(args.data, args.state)
+        if summary is None:
+            print("✅ No new listings; model unchanged.")
+            return
+        print(f"🧹 Re-filtered {summary['buckets_refiltered']}/{summary['buckets']} locations ({summary['rows_refiltered']} rows)")
+        store = state.feature_store()
+    elif args.chunked:
+        # 1-2. Streaming ingestion straight into typed arrays
+        print(f"⏳ Streaming {args.data} in chunks of {args.chunksize} rows...")
+        store = ingest_chunked(args.data, args.chunksize)
+        print(f"✅ Feature store: {len(store)} rows, {len(store.locations)} locations, {store.nbytes / 1024:.0f} KB")
+    else:
+        # 1. Load Data
+        print("⏳ Loading data...")
+        df = pd.read_csv(args.data)
+        print(f"✅ Data loaded. Shape: {df.shape}")
 
+        # 2. Data Cleaning & Feature Engineering
+        print("🧹 Cleaning data...")
+        clean = preprocess(df)
+        del df
+        codes, locations = pd.factorize(clean['location'], sort=True)
+        store = FeatureStore.from_arrays(codes, clean['total_sqft'], clean['bath'], clean['bhk'], clean['price'], list(locations))
+        del clean
 
+    if args.feature_store:
+        store.save(args.feature_store)
+        print(f"💾 Feature store saved to {args.feature_store}")
 
-# Limiting depth and estimators significantly reduces model size.
-model = RandomForestRegressor(n_estimators=100, max_depth=12, random_state=10, n_jobs=-1)
-model.fit(X_train, y_train)
+    # Only 4 of ~243 columns are non-zero per row, so CSR keeps the design matrix O(rows)
+    X = store.to_matrix() if args.dense else store.to_csr()
+    y = store.price
+    print(f"✅ Preprocessing done. Final Shape: {(X.shape[0], X.shape[1] + 1)}")
 
-score = model.score(X_test, y_test)
-print(f"🎯 Model Accuracy (R^2): {score:.4f}")
+    # 3. Model Training
+    params = DEFAULT_PARAMS
+    if args.sweep:
+        params = sweep(X, y, args)
+        if params is None:
+            return
+    model = None
+    if args.incremental and not args.refit and not summary['columns_changed']:
+        model = extend_model(X, y, args.add_trees, args.max_trees)
+    if model is None:
+        model = train_model(X, y, params)
 
-# 4. Save Model & Columns
-output_model_file = "banglore_home_prices_model.pickle"
-with open(output_model_file, 'wb') as f:
-    pickle.dump(model, f)
+    # 4. Save Model & Columns
+    save_artifacts(model, store.columns)
+    if args.incremental:
+        state.save(args.state)
+        print(f"💾 Training state saved to {args.state} ({len(state)} cleaned rows)")
+    if args.publish:
+        version = model_registry.publish(".", args.registry)
+        print(f"🚀 Published model version {version} to {args.registry}")
 
-columns = {
-    'data_columns': [col.lower() for col in X.columns]
-}
-with open("columns.json", "w") as f:
-    f.write(json.dumps(columns))
 
-# Check size
-size_mb = os.path.getsize(output_model_file) / (1024 * 1024)
-print(f"📦 Model saved to {output_model_file}")
-print(f"START_SIZE:{size_mb:.2f}MB:END_SIZE")
+if __name__ == "__main__":
+    main()
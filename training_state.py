@@ -0,0 +1,212 @@
+"""Persisted intermediate state for incremental retraining.
+
+Keeps every cleaned listing that survives the row-local steps (clean_rows + small-unit filter)
+with its raw location code, the per-raw-location listing counts used for 'other' bucketing,
+per-bucket price-per-sqft statistics, and the outlier keep-mask. New listings appended to the
+CSV are read from the stored byte offset and cleaned on their own; the two outlier filters are
+then re-run only for the location buckets that received rows. The resulting training rows are
+identical to a full preprocess() of the whole file.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FeatureStore
+
+STATE_FORMAT_VERSION = 1
+# Bytes before the stored offset that must be unchanged for an incremental read to be valid
+TAIL_CHECK_BYTES = 4096
+
+
+def _tail_digest(path: str, offset: int) -> str:
+    with open(path, "rb") as f:
+        start = max(0, offset - TAIL_CHECK_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def filter_bucket(pps: np.ndarray, bhk: np.ndarray):
+    """Outlier filters for one location bucket (rows in file order).
+
+    Returns (keep mask, pps mean, pps std): the pps filter keeps rows within one population std
+    of the bucket mean; the bhk filter then drops n-BHK rows priced per sqft below the mean of
+    the bucket's (n-1)-BHK rows when there are more than 5 of those. Uses np.mean/np.std like
+    price_per_sqft_stats, so decisions match remove_pps_outliers/remove_bhk_outliers exactly.
+    """
+    mean = np.mean(pps)
+    std = np.std(pps)
+    keep = (pps > (mean - std)) & (pps <= (mean + std))
+    kept = np.nonzero(keep)[0]
+    kept_bhk = bhk[kept]
+    kept_pps = pps[kept]
+    exclude = np.zeros(len(kept), dtype=bool)
+    for n in np.unique(kept_bhk):
+        prev = kept_pps[kept_bhk == n - 1]
+        if len(prev) > 5:
+            rows = kept_bhk == n
+            exclude[rows] = kept_pps[rows] < np.mean(prev)
+    keep[kept[exclude]] = False
+    return keep, mean, std
+
+
+class TrainingState:
+    """Cleaned candidate rows plus the statistics needed to update the outlier filters."""
+
+    def __init__(self, raw_locations, raw_counts, raw_code, total_sqft, bath, bhk, price, pps,
+                 keep=None, bucket_names=None, bucket_mean=None, bucket_std=None,
+                 source_path=None, bytes_consumed=0, tail_sha1=None, min_location_count=10):
+        self.raw_locations = list(raw_locations)
+        self.raw_counts = np.asarray(raw_counts, dtype=np.int64)
+        self.raw_code = np.asarray(raw_code, dtype=np.int32)
+        self.total_sqft = np.asarray(total_sqft, dtype=np.float64)
+        self.bath = np.asarray(bath, dtype=np.float64)
+        self.bhk = np.asarray(bhk, dtype=np.int64)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.pps = np.asarray(pps, dtype=np.float64)
+        self.keep = np.asarray(keep, dtype=bool) if keep is not None else np.zeros(len(self.pps), dtype=bool)
+        self.bucket_names = list(bucket_names or [])
+        self.bucket_mean = np.asarray(bucket_mean if bucket_mean is not None else [], dtype=np.float64)
+        self.bucket_std = np.asarray(bucket_std if bucket_std is not None else [], dtype=np.float64)
+        self.source_path = source_path
+        self.bytes_consumed = int(bytes_consumed)
+        self.tail_sha1 = tail_sha1
+        self.min_location_count = min_location_count
+
+    def __len__(self) -> int:
+        return len(self.pps)
+
+    # --- Building and appending ---
+
+    @classmethod
+    def empty(cls, min_location_count: int = 10) -> "TrainingState":
+        return cls([], [], [], [], [], [], [], [], min_location_count=min_location_count)
+
+    def append_clean(self, clean: pd.DataFrame, candidates: pd.DataFrame) -> set:
+        """Add rows already passed through clean_rows (`clean`, for the location counts) and
+        remove_small_units (`candidates`, the rows kept). Returns the raw codes that got rows."""
+        index = {name: i for i, name in enumerate(self.raw_locations)}
+        for name in pd.unique(clean['location']):
+            if name not in index:
+                index[name] = len(self.raw_locations)
+                self.raw_locations.append(name)
+        counts = clean['location'].map(index).to_numpy()
+        self.raw_counts = np.concatenate([self.raw_counts, np.zeros(len(self.raw_locations) - len(self.raw_counts), dtype=np.int64)])
+        np.add.at(self.raw_counts, counts, 1)
+
+        codes = candidates['location'].map(index).to_numpy().astype(np.int32)
+        self.raw_code = np.concatenate([self.raw_code, codes])
+        self.total_sqft = np.concatenate([self.total_sqft, candidates['total_sqft'].to_numpy(dtype=np.float64)])
+        self.bath = np.concatenate([self.bath, candidates['bath'].to_numpy(dtype=np.float64)])
+        self.bhk = np.concatenate([self.bhk, candidates['bhk'].to_numpy(dtype=np.int64)])
+        self.price = np.concatenate([self.price, candidates['price'].to_numpy(dtype=np.float64)])
+        self.pps = np.concatenate([self.pps, candidates['price_per_sqft'].to_numpy(dtype=np.float64)])
+        self.keep = np.concatenate([self.keep, np.zeros(len(codes), dtype=bool)])
+        return set(np.unique(codes).tolist())
+
+    def read_appended(self, path: str) -> pd.DataFrame:
+        """Raw rows added to `path` since the last ingest (empty frame if none)."""
+        size = os.path.getsize(path)
+        if (self.source_path is not None and os.path.abspath(path) != os.path.abspath(self.source_path)) \
+                or size < self.bytes_consumed or _tail_digest(path, self.bytes_consumed) != self.tail_sha1:
+            raise ValueError(f"❌ {path} is not an append-only continuation of the ingested file; run a full rebuild")
+        header = pd.read_csv(path, nrows=0).columns
+        with open(path, "rb") as f:
+            f.seek(self.bytes_consumed)
+            rows = pd.read_csv(f, header=None, names=header, skip_blank_lines=True,
+                               dtype={'location': str, 'size': str, 'total_sqft': str})
+        self.mark_consumed(path, size)
+        return rows
+
+    def mark_consumed(self, path: str, size: int = None):
+        self.source_path = os.path.abspath(path)
+        self.bytes_consumed = os.path.getsize(path) if size is None else size
+        self.tail_sha1 = _tail_digest(path, self.bytes_consumed)
+
+    # --- Bucketing and outlier filters ---
+
+    def bucket_of_raw(self) -> np.ndarray:
+        """Bucket name per raw location: itself when it has more than min_location_count listings, else 'other'."""
+        names = np.array(self.raw_locations, dtype=object)
+        return np.where(self.raw_counts > self.min_location_count, names, 'other')
+
+    def update_filters(self, touched_raw_codes=None) -> dict:
+        """Re-bucket and re-run the outlier filters for buckets that changed.
+
+        A bucket changes when it received new rows or when its raw-location membership changed
+        (a location crossing the 'other' threshold). Returns a summary including whether the set
+        of buckets (i.e. the model's one-hot columns) changed.
+        """
+        bucket_of_raw = self.bucket_of_raw()
+        names = sorted(set(bucket_of_raw[np.unique(self.raw_code)].tolist())) if len(self) else []
+        columns_changed = names != self.bucket_names
+        code_of = {name: i for i, name in enumerate(names)}
+        raw_to_bucket = np.array([code_of.get(b, -1) for b in bucket_of_raw], dtype=np.int64)
+        row_bucket = raw_to_bucket[self.raw_code]
+
+        if touched_raw_codes is None or columns_changed:
+            changed = set(range(len(names)))
+        else:
+            changed = {int(raw_to_bucket[c]) for c in touched_raw_codes}
+
+        old_stats = {name: (m, s) for name, m, s in zip(self.bucket_names, self.bucket_mean, self.bucket_std)}
+        mean = np.array([old_stats.get(n, (np.nan, np.nan))[0] for n in names], dtype=np.float64)
+        std = np.array([old_stats.get(n, (np.nan, np.nan))[1] for n in names], dtype=np.float64)
+
+        order = np.argsort(row_bucket, kind='stable')
+        bounds = np.searchsorted(row_bucket[order], np.arange(len(names) + 1))
+        rows_refiltered = 0
+        for b in sorted(changed):
+            idx = order[bounds[b]:bounds[b + 1]]
+            if not len(idx):
+                continue
+            keep, mean[b], std[b] = filter_bucket(self.pps[idx], self.bhk[idx])
+            self.keep[idx] = keep
+            rows_refiltered += len(idx)
+
+        self.bucket_names = names
+        self.bucket_mean = mean
+        self.bucket_std = std
+        self._row_bucket = row_bucket
+        return {"buckets": len(names), "buckets_refiltered": len(changed), "rows_refiltered": rows_refiltered,
+                "columns_changed": columns_changed}
+
+    def feature_store(self) -> FeatureStore:
+        """Kept rows ordered by bucket then file order, exactly as preprocess() emits them."""
+        row_bucket = getattr(self, "_row_bucket", None)
+        if row_bucket is None:
+            self.update_filters([])
+            row_bucket = self._row_bucket
+        rows = np.nonzero(self.keep)[0]
+        rows = rows[np.argsort(row_bucket[rows], kind='stable')]
+        return FeatureStore.from_arrays(row_bucket[rows], self.total_sqft[rows], self.bath[rows], self.bhk[rows],
+                                        self.price[rows], self.bucket_names)
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        meta = {"format_version": STATE_FORMAT_VERSION, "source_path": self.source_path,
+                "bytes_consumed": self.bytes_consumed, "tail_sha1": self.tail_sha1,
+                "min_location_count": self.min_location_count}
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, raw_locations=np.array(self.raw_locations, dtype=str), raw_counts=self.raw_counts,
+                 raw_code=self.raw_code, total_sqft=self.total_sqft, bath=self.bath, bhk=self.bhk,
+                 price=self.price, pps=self.pps, keep=self.keep,
+                 bucket_names=np.array(self.bucket_names, dtype=str), bucket_mean=self.bucket_mean,
+                 bucket_std=self.bucket_std, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TrainingState":
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get("format_version") != STATE_FORMAT_VERSION:
+                raise ValueError(f"❌ {path} has an unsupported format; run a full rebuild")
+            return cls(data['raw_locations'].tolist(), data['raw_counts'], data['raw_code'], data['total_sqft'],
+                       data['bath'], data['bhk'], data['price'], data['pps'], keep=data['keep'],
+                       bucket_names=data['bucket_names'].tolist(), bucket_mean=data['bucket_mean'],
+                       bucket_std=data['bucket_std'], source_path=meta["source_path"],
+                       bytes_consumed=meta["bytes_consumed"], tail_sha1=meta["tail_sha1"],
+                       min_location_count=meta["min_location_count"])
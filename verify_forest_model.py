@@ -0,0 +1,68 @@
+"""Check that the native flat-array forest reproduces the pickled sklearn model exactly.
+
+Rebuilds feature rows from BHP.csv (every row with a parseable size/sqft/bath, including
+locations outside the model's one-hot columns) and compares ForestModel.predict against
+RandomForestRegressor.predict bit for bit.
+
+Usage: python verify_forest_model.py [model.pickle] [forest_dir]
+"""
+import pickle
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import FeatureSchema
+from forest_model import ForestModel
+
+model_file = sys.argv[1] if len(sys.argv) > 1 else "banglore_home_prices_model.pickle"
+forest_dir = sys.argv[2] if len(sys.argv) > 2 else "banglore_home_prices_model.forest"
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+with open(model_file, "rb") as f:
+    sk_model = pickle.load(f)
+# sklearn adds tree predictions in thread completion order when n_jobs != 1; in-order
+# accumulation is what the native engine reproduces.
+sk_model.n_jobs = 1
+forest = ForestModel.load(forest_dir)
+schema = FeatureSchema.from_file("columns.json")
+
+df = pd.read_csv("BHP.csv").dropna(subset=["size", "total_sqft", "bath"])
+df["total_sqft"] = pd.to_numeric(df["total_sqft"], errors="coerce")
+df = df.dropna(subset=["total_sqft"])
+items = [{
+    "location": row.location,
+    "total_sqft": row.total_sqft,
+    "bath": row.bath,
+    "bhk": int(str(row.size).split(" ")[0]),
+} for row in df.itertuples()]
+X = schema.build_matrix(items)
+
+start = time.perf_counter()
+expected = sk_model.predict(X)
+sk_time = time.perf_counter() - start
+
+start = time.perf_counter()
+actual = forest.predict(X)
+native_time = time.perf_counter() - start
+
+single_rows = X[:200]
+start = time.perf_counter()
+single = np.array([forest.predict(row.reshape(1, -1))[0] for row in single_rows])
+native_single = (time.perf_counter() - start) / len(single_rows)
+start = time.perf_counter()
+for row in single_rows[:50]:
+    sk_model.predict(row.reshape(1, -1))
+sk_single = (time.perf_counter() - start) / 50
+
+mismatches = int(np.count_nonzero(expected != actual)) + int(np.count_nonzero(expected[:len(single)] != single))
+print(f"🔢 Rows compared: {len(X)}")
+print(f"⏱️ Batch: sklearn {sk_time * 1000:.1f} ms, native {native_time * 1000:.1f} ms")
+print(f"⏱️ Single row: sklearn {sk_single * 1000:.2f} ms, native {native_single * 1000:.2f} ms")
+if mismatches:
+    print(f"❌ {mismatches} predictions differ (max abs diff {np.abs(expected - actual).max():.3e})")
+    sys.exit(1)
+print("✅ Native forest predictions are bit-for-bit identical to sklearn.")